@@ -0,0 +1,149 @@
+"""Allocation benchmark of `HumanModel` in long runs.
+
+Measures per helper type and N, on a model that keeps producing killer nanites (high illness chance, no death):
+ - run: the time of a run of --steps steps
+ - agent_bytes: the memory of a single agent per class, averaged over --agents agents
+ - peak_memory: the peak of the memory allocated during the run
+ - gc_collections: the amount of garbage collections during the run, a measure of the objects created
+ - killers: the killer nanites created and reused from the model's `KillerPool`
+
+Runs on earlier commits as well, for a comparison of the results with --compare.
+
+Usage:
+    python -m benchmarks.bench_alloc [--quick] [--output alloc.json]
+    python -m benchmarks.bench_alloc --compare before.json [after.json]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict
+
+from benchmarks.common import compare, read_results, summarize, write_results
+from loan.agentfactory import AgentFactory
+from loan.greedyhelperagent import GreedyHelperAgent
+from loan.helperagent import HelperAgent
+from loan.killeragent import KillerAgent
+from loan.model import HumanModel
+
+NS = (10, 100)
+HELPERS = ("helperagent", "greedyhelperagent")
+QUICK = {"ns": (10,), "steps": 200}
+
+
+def make_model(n: int, helper: str) -> HumanModel:
+    return HumanModel(N=n, helper_type=helper, factory_location=3, hitpoints=10**9, illness_chance=0.9,
+                      max_ill_vertices=8, seed=0, collect_data=False)
+
+
+def agent_bytes(agents: int) -> Dict[str, float]:
+    """Memory per agent of every agent class, including its attributes."""
+    model = make_model(1, "helperagent")
+    factory = model.agent_factory
+    classes = {"HelperAgent": lambda i: HelperAgent(i, model, 1, 100),
+               "GreedyHelperAgent": lambda i: GreedyHelperAgent(i, model, 1, 100),
+               "KillerAgent": lambda i: KillerAgent(i, model, factory, factory.pos, 1, "KOVID"),
+               "AgentFactory": lambda i: AgentFactory(i, model, 1)}
+    sizes = {}
+    for name, create in classes.items():
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            created = [create(i) for i in range(agents)]
+            sizes[name] = (tracemalloc.get_traced_memory()[0] - before) / agents
+        finally:
+            tracemalloc.stop()
+        del created
+    return sizes
+
+
+def bench_run(n: int, helper: str, steps: int, repeat: int) -> Dict:
+    times, collections = [], []
+    for _ in range(repeat):
+        model = make_model(n, helper)
+        gc.collect()
+        before = sum(stats["collections"] for stats in gc.get_stats())
+        start = time.perf_counter()
+        for _ in range(steps):
+            model.step()
+        times.append(time.perf_counter() - start)
+        collections.append(sum(stats["collections"] for stats in gc.get_stats()) - before)
+    pool = getattr(model, "killer_pool", None)  # Not on commits before the pool
+    return {"run": summarize(times), "gc_collections": min(collections),
+            "killers": {"created": pool.created, "reused": pool.reused} if pool is not None else None}
+
+
+def bench_memory(n: int, helper: str, steps: int) -> int:
+    tracemalloc.start()
+    try:
+        model = make_model(n, helper)
+        for _ in range(steps):
+            model.step()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(ns, helpers, steps=1000, repeat=3, agents=10000) -> Dict:
+    sizes = agent_bytes(agents)
+    print("  ".join(f"{name} {size:.0f} B" for name, size in sizes.items()))
+    results = {}
+    for helper in helpers:
+        for n in ns:
+            case = f"{helper}/N={n}"
+            result = results[case] = {**bench_run(n, helper, steps, repeat), "peak_memory": bench_memory(n, helper, steps)}
+            killers = result["killers"]
+            print(f"{case:<30} run {result['run']['median']:8.3f} s  peak {result['peak_memory'] / 2**20:8.2f} MiB  "
+                  f"gc {result['gc_collections']:6d}"
+                  + (f"  killers created {killers['created']} reused {killers['reused']}" if killers else ""), flush=True)
+    return {"config": {"ns": list(ns), "helpers": list(helpers), "steps": steps, "repeat": repeat, "agents": agents},
+            "agent_bytes": sizes, "results": results}
+
+
+def compare_memory(old: Dict, new: Dict) -> None:
+    """Prints the change of the memory per agent, the peak memory and the garbage collections from old to new."""
+    for name in sorted(old["agent_bytes"].keys() & new["agent_bytes"].keys()):
+        before, after = old["agent_bytes"][name], new["agent_bytes"][name]
+        print(f"{name + ' bytes':<60} {before:13.0f}    -> {after:13.0f}    {after / before - 1:+7.1%}")
+    for case in sorted(old["results"].keys() & new["results"].keys()):
+        for metric in ("peak_memory", "gc_collections"):
+            before, after = old["results"][case][metric], new["results"][case][metric]
+            change = after / before - 1 if before else 0.0
+            print(f"{case + '/' + metric:<60} {before:13d}    -> {after:13d}    {change:+7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Only a short run with few agents, for a fast check")
+    parser.add_argument("--n", type=int, nargs="+", default=None, help=f"Amounts of helpers (default {NS})")
+    parser.add_argument("--helpers", nargs="+", choices=HELPERS, default=HELPERS)
+    parser.add_argument("--steps", type=int, default=None, help="Steps per run (default 1000)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=None, help="Write the results to this JSON file")
+    parser.add_argument("--compare", type=Path, nargs="+", default=None, metavar="JSON",
+                        help="Compare with earlier results: one file to compare a new run with, or two files")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown reported as regression")
+    args = parser.parse_args()
+
+    if args.compare is not None and len(args.compare) == 2:
+        old, new = read_results(args.compare[0]), read_results(args.compare[1])
+        regressions = compare(old, new, args.threshold)
+        compare_memory(old, new)
+        raise SystemExit(1 if regressions else 0)
+
+    ns = args.n or (QUICK["ns"] if args.quick else NS)
+    steps = args.steps or (QUICK["steps"] if args.quick else 1000)
+    results = run(ns, args.helpers, steps=steps, repeat=args.repeat)
+    if args.output is not None:
+        write_results(args.output, results)
+    if args.compare is not None:
+        old = read_results(args.compare[0])
+        regressions = compare(old, {"environment": {"commit": "current"}, **results}, args.threshold)
+        compare_memory(old, results)
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Import-time benchmark of `loan.model`.
+
+Every measurement runs in a fresh interpreter, like a worker process of the batch runner.
+Measures the time to import `loan.model` and the time to create the first `HumanModel`,
+with a cold and a warm network cache.
+
+Usage: python -m benchmarks.bench_import [--repeat 10] [--output import.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SNIPPET = """
+import time
+t0 = time.perf_counter()
+import loan.model
+t1 = time.perf_counter()
+loan.model.HumanModel()
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+"""
+
+
+def measure(cache_dir: str) -> tuple:
+    """Runs the snippet in a fresh interpreter, returns (import time, first model time) in seconds."""
+    env = {"LOAN_CACHE_DIR": cache_dir, "PYTHONPATH": str(ROOT)}
+    out = subprocess.run([sys.executable, "-c", SNIPPET], env=env, cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    import_time, model_time = map(float, out.split())
+    return import_time, model_time
+
+
+def run(repeat: int = 10) -> dict:
+    results = {"import": [], "first_model_cold_cache": [], "first_model_warm_cache": []}
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            import_time, cold = measure(cache_dir)
+            _, warm = measure(cache_dir)
+        results["import"].append(import_time)
+        results["first_model_cold_cache"].append(cold)
+        results["first_model_warm_cache"].append(warm)
+
+    return {name: {"median": statistics.median(times), "min": min(times), "times": times}
+            for name, times in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", type=Path, default=None, help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    for name, result in results.items():
+        print(f"{name:<25} median {result['median'] * 1000:8.2f} ms   min {result['min'] * 1000:8.2f} ms")
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Throughput benchmark of `HumanModel`.
+
+Runs every combination of network, helper type and N, and measures:
+ - init: creating a model (on a topology that is already loaded)
+ - step: a single step, and per stage (perceive, act, update) of the schedule
+ - run: a full run of --run-steps steps
+ - peak_memory: the peak of the memory allocated while creating a model and running --run-steps steps
+
+The networks are the body ("body") and generated circulatory networks ("generated-<size>").
+Results are written as JSON, and can be compared with those of another commit.
+
+Usage:
+    python -m benchmarks.bench_model [--quick] [--output model.json]
+    python -m benchmarks.bench_model --compare before.json [after.json]
+"""
+import argparse
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from benchmarks.common import compare, read_results, summarize, write_results
+from loan.generator import generate_network
+from loan.model import HumanModel
+from loan.scheduler import ActivityScheduler
+from loan.topology import Topology, load_topology
+
+HELPERS = {"helperagent": {"helper_type": "helperagent"},
+           "helperagent-vectorized": {"helper_type": "helperagent", "helper_engine": "vectorized"},
+           "greedyhelperagent": {"helper_type": "greedyhelperagent"}}
+NS = (1, 10, 100, 1000, 10000)
+SIZES = (1000, 10000)
+QUICK = {"ns": (1, 100), "sizes": (), "helpers": ("helperagent", "greedyhelperagent")}
+
+
+class TimedActivityScheduler(ActivityScheduler):
+    """ActivityScheduler that adds the time spent in each stage to `stage_times`."""
+
+    def _run_stage(self, stage, agents) -> None:
+        start = time.perf_counter()
+        super()._run_stage(stage, agents)
+        self.stage_times[stage].append(time.perf_counter() - start)
+
+
+def networks(sizes) -> Iterator[Tuple[str, Topology]]:
+    yield "body", load_topology(HumanModel.NETWORK)
+    for size in sizes:
+        edges, positions = generate_network(size, seed=0)
+        yield f"generated-{size}", Topology.from_edges(edges, positions)
+
+
+def make_model(topology: Topology, n: int, helper: str, **params) -> HumanModel:
+    return HumanModel(N=n, network=topology, factory_location=topology.vertices[0], seed=0, collect_data=False,
+                      **HELPERS[helper], **params)
+
+
+def bench_init(topology, n, helper, repeat) -> Dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        make_model(topology, n, helper)
+        times.append(time.perf_counter() - start)
+    return summarize(times)
+
+
+def bench_step(topology, n, helper, min_time, max_steps, warmup=5) -> Dict:
+    """Times single steps of a model that doesn't die, until min_time has passed or max_steps steps were made."""
+    model = make_model(topology, n, helper, hitpoints=10**9)
+    for _ in range(warmup):
+        model.step()
+    model.schedule.__class__ = TimedActivityScheduler
+    model.schedule.stage_times = defaultdict(list)
+
+    times, total = [], 0.0
+    while total < min_time and len(times) < max_steps:
+        start = time.perf_counter()
+        model.step()
+        times.append(time.perf_counter() - start)
+        total += times[-1]
+    return {"step": summarize(times),
+            "stages": {stage: summarize(stage_times) for stage, stage_times in model.schedule.stage_times.items()}}
+
+
+def bench_run(topology, n, helper, run_steps, repeat) -> Dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model = make_model(topology, n, helper)
+        while model.running and model.schedule.steps < run_steps:
+            model.step()
+        times.append(time.perf_counter() - start)
+    return summarize(times)
+
+
+def bench_memory(topology, n, helper, run_steps) -> int:
+    tracemalloc.start()
+    try:
+        model = make_model(topology, n, helper)
+        while model.running and model.schedule.steps < run_steps:
+            model.step()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(ns, sizes, helpers, repeat=3, min_time=0.5, max_steps=50, run_steps=100) -> Dict:
+    results = {}
+    for network, topology in networks(sizes):
+        for helper in helpers:
+            for n in ns:
+                case = f"{network}/{helper}/N={n}"
+                start = time.perf_counter()
+                results[case] = {"init": bench_init(topology, n, helper, repeat),
+                                 **bench_step(topology, n, helper, min_time, max_steps),
+                                 "run": bench_run(topology, n, helper, run_steps, repeat),
+                                 "peak_memory": bench_memory(topology, n, helper, run_steps)}
+                result = results[case]
+                print(f"{case:<45} init {result['init']['median'] * 1000:9.2f} ms  "
+                      f"step {result['step']['median'] * 1000:9.3f} ms  run {result['run']['median']:8.3f} s  "
+                      f"peak {result['peak_memory'] / 2**20:8.1f} MiB  ({time.perf_counter() - start:.0f} s)", flush=True)
+    return {"config": {"ns": list(ns), "sizes": list(sizes), "helpers": list(helpers), "repeat": repeat,
+                       "min_time": min_time, "max_steps": max_steps, "run_steps": run_steps},
+            "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Only a few small cases, for a fast check")
+    parser.add_argument("--n", type=int, nargs="+", default=None, help=f"Amounts of helpers (default {NS})")
+    parser.add_argument("--sizes", type=int, nargs="*", default=None,
+                        help=f"Sizes of the generated networks (default {SIZES})")
+    parser.add_argument("--helpers", nargs="+", choices=list(HELPERS), default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--run-steps", type=int, default=100)
+    parser.add_argument("--output", type=Path, default=None, help="Write the results to this JSON file")
+    parser.add_argument("--compare", type=Path, nargs="+", default=None, metavar="JSON",
+                        help="Compare with earlier results: one file to compare a new run with, or two files")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown reported as regression")
+    args = parser.parse_args()
+
+    if args.compare is not None and len(args.compare) == 2:
+        regressions = compare(read_results(args.compare[0]), read_results(args.compare[1]), args.threshold)
+        raise SystemExit(1 if regressions else 0)
+
+    defaults = QUICK if args.quick else {"ns": NS, "sizes": SIZES, "helpers": tuple(HELPERS)}
+    results = run(args.n or defaults["ns"], defaults["sizes"] if args.sizes is None else args.sizes,
+                  args.helpers or defaults["helpers"], repeat=args.repeat, run_steps=args.run_steps)
+    if args.output is not None:
+        write_results(args.output, results)
+    if args.compare is not None:
+        new = {"environment": {"commit": "current"}, **results}
+        regressions = compare(read_results(args.compare[0]), new, args.threshold)
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
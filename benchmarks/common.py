@@ -0,0 +1,69 @@
+"""Helpers shared by the benchmarks: timing statistics, the environment and JSON result files."""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def git_revision() -> Dict[str, object]:
+    """The commit the benchmarks run on and whether the tree has uncommitted changes."""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--", "loan"))}
+
+
+def environment() -> Dict[str, object]:
+    """Where and on what the benchmarks ran, stored with the results."""
+    import numpy as np
+
+    return {**git_revision(), "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+            "numpy": np.__version__, "platform": platform.platform(), "processor": platform.processor()}
+
+
+def summarize(times: Sequence[float]) -> Dict[str, object]:
+    return {"median": statistics.median(times), "min": min(times), "mean": statistics.mean(times),
+            "times": list(times)}
+
+
+def write_results(path: Path, results: Dict[str, object]) -> None:
+    Path(path).write_text(json.dumps({"environment": environment(), **results}, indent=2))
+
+
+def read_results(path: Path) -> Dict[str, object]:
+    return json.loads(Path(path).read_text())
+
+
+def _medians(results: Dict[str, object], prefix: str = "") -> Dict[str, float]:
+    """All medians in the (nested) results, by their path."""
+    medians = {}
+    for name, value in results.items():
+        if isinstance(value, dict) and "median" in value:
+            medians[prefix + name] = value["median"]
+        elif isinstance(value, dict):
+            medians.update(_medians(value, f"{prefix}{name}/"))
+    return medians
+
+
+def compare(old: Dict[str, object], new: Dict[str, object], threshold: float = 0.1) -> List[str]:
+    """Prints the change of every median from old to new results, returns the ones that got slower than threshold."""
+    old_medians, new_medians = _medians(old["results"]), _medians(new["results"])
+    print(f"{(old['environment'].get('commit') or '?')[:10]} -> {(new['environment'].get('commit') or '?')[:10]}")
+    regressions = []
+    for name in sorted(old_medians.keys() & new_medians.keys()):
+        before, after = old_medians[name], new_medians[name]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  SLOWER"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<60} {before * 1000:10.3f} ms -> {after * 1000:10.3f} ms {change:+7.1%}{flag}")
+    return regressions
@@ -1,45 +1,62 @@
-from uuid import uuid1
+import heapq
 
 from mesa import Agent, Model
 
-from loan.helperagent import HelperAgent
-from loan.killeragent import KillerAgent
-
 
 class AgentFactory(Agent):
-
-    def __init__(self, unique_id: int, model: Model, pos: int) -> None:
+    """Produces killer nanites for the ill vertices reported by the helper agents on its vertex.
+    Killer nanites for known diseases are ready right away, for a new disease they wait one tick while it's studied.
+    Ready killer nanites are spawned in the order of the model's `Dispatch`.
+    An idle factory sleeps (see `ActivityScheduler`) until the grid reports a helper with an alert on its vertex.
+    """
+    EMOJI = " 🏭"
+    __slots__ = ("unique_id", "model", "pos", "helper_agents_with_alerts", "library_of_diseases", "nanite_queue",
+                 "killer_agents_to_spawn", "newly_found_diseases")
+
+    def __init__(self, unique_id: int, model: Model, pos: int, library_of_diseases: list = None) -> None:
+        """The library of diseases can be shared between factories, each factory gets its own if not given."""
         super().__init__(unique_id, model)
         self.pos = pos
         self.helper_agents_with_alerts = []     # A list with agents on the factory position that have found a illness
-        self.library_of_diseases = []           # A list with previously encountered illness
-        self.nanite_queue = []                  #
-        self.killer_agents_to_spawn = []        #
-        self.newly_found_disease = None         #
+        self.library_of_diseases = library_of_diseases if library_of_diseases is not None else []  # A list with previously encountered illness
+        self.nanite_queue = []                  # Heap of (priority, sequence, ready at tick, killer nanite)
+        self.killer_agents_to_spawn = []        # Killer nanites spawned in this tick's update
+        self.newly_found_diseases = []          # Diseases added to the library in this tick's update
 
     def perceive(self) -> None:
         # agents visiting on own position carrying alerts for diseases on certain nodes
-        visiting_agents = self.model.network.nodes[self.pos]["agent"]
-        self.helper_agents_with_alerts = [a for a in visiting_agents if isinstance(a, HelperAgent) and a.alert_for_disease_on_node]
+        self.helper_agents_with_alerts = self.model.get_helpers_with_alerts(self.pos)
 
     def act(self) -> None:
+        dispatch = self.model.dispatch
+        now = self.model.schedule.steps
         for helper_agent in self.helper_agents_with_alerts:
             target, disease = helper_agent.alert_for_disease_on_node
 
-            # check if disease is known
-            if disease in self.library_of_diseases:
-                # send killer nanite immediately to location if disease is known
-                self.killer_agents_to_spawn.append(KillerAgent(uuid1().int, self.model, self, self.pos, target, disease))
+            # a killer nanite is already waiting or on its way for this report
+            if not dispatch.report(target, disease):
+                continue
 
+            # check if disease is known
+            ready_at = now
+            if disease not in self.library_of_diseases:
+                # new disease, make killer nanite wait for a timestep
+                if disease not in self.newly_found_diseases:
+                    self.newly_found_diseases.append(disease)
+                ready_at += 1
+            killer = self.model.killer_pool.acquire(self, self.pos, target, disease)
+            heapq.heappush(self.nanite_queue, (dispatch.priority(target), next(dispatch.sequence), ready_at, killer))
+
+        # spawn the ready killer nanites with the highest priority
+        not_ready = []
+        while self.nanite_queue and (dispatch.spawn_rate is None or len(self.killer_agents_to_spawn) < dispatch.spawn_rate):
+            entry = heapq.heappop(self.nanite_queue)
+            if entry[2] > now:
+                not_ready.append(entry)
             else:
-                # new disease
-                self.newly_found_disease = disease
-                # make killer nanite wait for one or more timesteps by adding to queue
-                self.nanite_queue.append(KillerAgent(uuid1().int, self.model, self, self.pos, target, disease))
-
-        # spawn the longest waiting killer nanite
-        if len(self.nanite_queue):
-            self.killer_agents_to_spawn.append(self.nanite_queue.pop())
+                self.killer_agents_to_spawn.append(entry[3])
+        for entry in not_ready:
+            heapq.heappush(self.nanite_queue, entry)
 
     def update(self) -> None:
         # reset alert_for_disease_on_node for helper agents
@@ -50,12 +67,21 @@ class AgentFactory(Agent):
         for agent in self.killer_agents_to_spawn:
             self.model.grid.place_agent(agent, self.pos)
             self.model.schedule.add(agent)
-            self.killer_agents_to_spawn.remove(agent)
+        self.killer_agents_to_spawn.clear()
 
         # update disease library
-        if self.newly_found_disease is not None:
-            self.library_of_diseases.append(self.newly_found_disease)
-            self.newly_found_disease = None
+        for disease in self.newly_found_diseases:
+            if disease not in self.library_of_diseases:  # May have been found by another factory
+                self.library_of_diseases.append(disease)
+        self.newly_found_diseases.clear()
+
+    def is_idle(self) -> bool:
+        """Whether the factory has no killer nanites waiting to be spawned."""
+        return not self.nanite_queue and not self.killer_agents_to_spawn
+
+    def can_sleep(self) -> bool:
+        """Whether the factory has nothing to do until a helper brings an alert to its vertex."""
+        return self.is_idle() and not self.model.get_helpers_with_alerts(self.pos)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__} {self.model}/{self.unique_id}: Position {self.pos}"
@@ -64,4 +90,4 @@ class AgentFactory(Agent):
         return self.__repr__()
 
     def emojify(self):
-        return " 🏭"
\ No newline at end of file
+        return self.EMOJI
\ No newline at end of file
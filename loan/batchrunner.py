@@ -1,29 +1,79 @@
-from mesa.batchrunner import BatchRunnerMP
-
-from loan.model import HumanModel
 from collections import OrderedDict
+from itertools import combinations
+from pathlib import Path
 
+from loan.instrumentation import INSTRUMENTATION_COLUMNS
+from loan.model import HumanModel
+from loan.resultsink import CsvResultSink
+from loan.sweep import MODEL_REPORTERS, AdaptiveStopping, SweepExecutor
 
-def run_batch(iterations=100, max_steps=100):
-    fixed_params = {}
 
+def _variable_params():
     variable_params = OrderedDict()
     variable_params["factory_location"] = tuple(range(1, 15))
-    variable_params["N"] = (1, 2, 4, 8, 1)
+    variable_params["N"] = (1, 2, 4, 8)
     variable_params["helper_type"] = ("helperagent", "greedyhelperagent")
+    return variable_params
+
+
+def factory_sets(size: int, vertices=range(1, 15)):
+    """All sets of `size` factory locations, to sweep over with the factory_location parameter."""
+    return tuple(combinations(vertices, size))
+
+
+def _sort_key(column):
+    """Sort key of a result column: single values sort as 1-tuples in a column that holds tuples as well,
+    e.g. factory_location in a sweep over single factories and sets of factories."""
+    if column.dtype == object and any(isinstance(value, tuple) for value in column):
+        return column.map(lambda value: value if isinstance(value, tuple) else (value,))
+    return column
+
+
+def run_batch(iterations=100, max_steps=100, output: Path = None, collect_steps: bool = False, processes: int = None,
+              chunk_size: int = None, base_seed: int = 0, variable_params: dict = None, fixed_params: dict = None,
+              early_stop: bool = True, adaptive: AdaptiveStopping = None):
+    """Runs all combinations of the variable parameters `iterations` times for at most `max_steps` steps.
+    The runs are spread over `processes` worker processes (default: all available cores) by a `SweepExecutor`.
+    Every run is seeded from `base_seed`, the seed is stored with its results so the run can be replayed.
+
+    Without `output` the results are collected in memory and returned as a DataFrame.
+    With `output` every finished run is appended to that CSV file right away, and the (closed) sink is returned.
+    If `output` already holds results, for instance of a batch that crashed halfway, the runs in it are skipped.
+    With `collect_steps` the DataCollector data of every step is written to `<output>.steps.csv` as well.
+
+    With `early_stop` runs end as soon as their outcome is determined, with `adaptive` every parameter combination
+    stops running iterations once its results are precise enough, see `SweepExecutor`.
+
+    The values of factory_location can be sets of locations (tuples, see `factory_sets`) to run with multiple factories.
+    perception_radius bounds what the helpers sense and the cost of sensing it, not what they do: helpers don't act on
+    those percepts, so a sweep over it gives the same outcomes for every radius.
+    """
+    fixed_params = {} if fixed_params is None else fixed_params
+    variable_params = _variable_params() if variable_params is None else variable_params
+
+    executor = SweepExecutor(variable_params, fixed_params, iterations=iterations, max_steps=max_steps,
+                             processes=processes, chunk_size=chunk_size, base_seed=base_seed,
+                             collect_steps=collect_steps and output is not None, early_stop=early_stop,
+                             adaptive=adaptive)
+    param_names = list(variable_params)
+    reporter_names = ["Seed"] + list(MODEL_REPORTERS)
+
+    if output is None:
+        import pandas as pd
+
+        rows = [[result.params[name] for name in param_names] + [result.iteration, result.seed]
+                + list(result.reporters.values()) for result in executor.run()]
+        df = pd.DataFrame(rows, columns=param_names + ["Iteration"] + reporter_names)
+        # Get DataFrame with collected data
+        return df.sort_values(param_names + ["Iteration"], key=_sort_key, ignore_index=True)
 
-    model_reporters = {"Hitpoints": HumanModel.get_hitpoints,
-                       "Ill vertices": HumanModel.get_ill_vertices,
-                       "End time": HumanModel.get_end,
-                       "Vertices healed": HumanModel.get_healed_count}
-
-    batch_run = BatchRunnerMP(HumanModel,
-                              nr_processes=8,
-                              variable_parameters=variable_params,
-                              fixed_parameters=fixed_params,
-                              iterations=iterations,  # Iterations per combination of parameters
-                              max_steps=max_steps,
-                              model_reporters=model_reporters)
-
-    batch_run.run_all()  # Run all simulations
-    return batch_run.get_model_vars_dataframe()  # Get DataFrame with collected data
+    step_names = None
+    if collect_steps:
+        step_names = list(HumanModel.DATA_REPORTERS)
+        if fixed_params.get("instrument"):
+            step_names += INSTRUMENTATION_COLUMNS
+    with CsvResultSink(output, param_names, reporter_names, step_names) as sink:
+        completed = sink.completed()
+        for result in executor.run(skip=lambda variables, iteration: sink.run_key(variables, iteration) in completed):
+            sink.write_run(result.params, result.iteration, {"Seed": result.seed, **result.reporters}, result.steps)
+    return sink
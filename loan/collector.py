@@ -0,0 +1,159 @@
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+
+class ModelCollector:
+    """Collects the model level data of a `HumanModel` into preallocated NumPy buffers.
+    Replaces Mesa's DataCollector, with the same `collect`, `model_vars` and `get_model_vars_dataframe`.
+
+    Per collected step it records the hitpoints, the ill vertices (in the order in which they fell ill, and as a count),
+    the amount of helper agents alive and their total energy.
+    The ill vertices of all steps are stored one after another as vertex indices, with an offset per step.
+    Data is collected every `interval` steps, or not at all when the collector isn't `enabled`.
+    The buffers double in size when they are full.
+    """
+    COLUMNS = ("Hitpoints", "Ill vertices", "Ill vertex count", "Helper Agents alive", "Helper Agents energy")
+
+    def __init__(self, vertices: List[int], interval: int = 1, enabled: bool = True, capacity: int = 128):
+        self.vertices = vertices
+        self.interval = interval
+        self.enabled = enabled
+        self._index = {vertex: i for i, vertex in enumerate(vertices)}
+        self._n = 0
+        self._extra: Dict[str, Callable] = {}
+
+        self._steps = np.zeros(capacity, dtype=np.int64)
+        self._hitpoints = np.zeros(capacity, dtype=np.int64)
+        self._ill_count = np.zeros(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=np.int64)
+        self._energy = np.zeros(capacity, dtype=np.int64)
+        self._ill_offsets = np.zeros(capacity + 1, dtype=np.int64)  # Start of the ill vertices of every step
+        self._ill_order = np.zeros(capacity, dtype=np.int64)
+        self._extra_buffers: Dict[str, np.ndarray] = {}
+
+    def add_column(self, name: str, reporter: Callable) -> None:
+        """Adds a column that is filled with reporter(model) on every collected step."""
+        self._extra[name] = reporter
+        self._extra_buffers[name] = np.full(len(self._steps), np.nan)
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self._steps)
+        for name in ("_steps", "_hitpoints", "_ill_count", "_alive", "_energy"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        offsets = np.zeros(capacity + 1, dtype=np.int64)
+        offsets[:len(self._ill_offsets)] = self._ill_offsets
+        self._ill_offsets = offsets
+        for name, old in self._extra_buffers.items():
+            new = np.full(capacity, np.nan)
+            new[:len(old)] = old
+            self._extra_buffers[name] = new
+
+    def is_due(self, model) -> bool:
+        """Whether the current step of the model should be collected."""
+        return self.enabled and not model.schedule.steps % self.interval
+
+    def collect(self, model) -> None:
+        """Records the current state of the model, if this step should be collected."""
+        if not self.is_due(model):
+            return
+        if self._n == len(self._steps):
+            self._grow()
+
+        i = self._n
+        ill_count = len(model.ill_vertices)
+        self._steps[i] = model.schedule.steps
+        self._hitpoints[i] = model.hitpoints
+        self._ill_count[i] = ill_count
+        self._alive[i] = model.alive_helper_agents
+        self._energy[i] = model.total_energy_agents
+
+        start = self._ill_offsets[i]
+        end = start + ill_count
+        if end > len(self._ill_order):
+            order = np.zeros(max(2 * len(self._ill_order), end), dtype=np.int64)
+            order[:start] = self._ill_order[:start]
+            self._ill_order = order
+        index = self._index
+        self._ill_order[start:end] = [index[vertex] for vertex in model.ill_vertices]
+        self._ill_offsets[i + 1] = end
+        for name, reporter in self._extra.items():
+            self._extra_buffers[name][i] = reporter(model)
+        self._n += 1
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def steps(self) -> np.ndarray:
+        """The steps at which data was collected."""
+        return self._steps[:self._n]
+
+    def ill_vertices(self, i: int) -> List[int]:
+        """The ill vertices at the i-th collected step, in the order in which they fell ill, like `model.ill_vertices`."""
+        vertices = self.vertices
+        return [vertices[j] for j in self._ill_order[self._ill_offsets[i]:self._ill_offsets[i + 1]].tolist()]
+
+    @property
+    def model_vars(self) -> Dict[str, "ColumnView"]:
+        """Read-only views on the collected columns, by column name."""
+        n = self._n
+        columns = {"Hitpoints": self._hitpoints[:n],
+                   "Ill vertices": _IllVerticesColumn(self),
+                   "Ill vertex count": self._ill_count[:n],
+                   "Helper Agents alive": self._alive[:n],
+                   "Helper Agents energy": self._energy[:n]}
+        columns.update((name, buffer[:n]) for name, buffer in self._extra_buffers.items())
+        return {name: column if isinstance(column, ColumnView) else ColumnView(column) for name, column in columns.items()}
+
+    def rows(self) -> Iterator[Tuple]:
+        """The collected data as one tuple per collected step, in the order of `model_vars`."""
+        return zip(*self.model_vars.values())
+
+    def get_model_vars_dataframe(self):
+        """The collected data as a pandas DataFrame, one row per collected step.
+        When not every step is collected, the index holds the collected steps."""
+        import pandas as pd
+
+        data = {name: list(column) for name, column in self.model_vars.items()}
+        if self.interval == 1:
+            return pd.DataFrame(data)
+        return pd.DataFrame(data, index=pd.Index(self.steps, name="Step"))
+
+
+class ColumnView(Sequence):
+    """Read-only view on a collected column, returning plain Python values."""
+
+    def __init__(self, values: np.ndarray):
+        self._values = values
+
+    def __getitem__(self, i):
+        return self._values[i].tolist()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class _IllVerticesColumn(ColumnView):
+    """The ill vertices per collected step, looked up in the collector on access."""
+
+    def __init__(self, collector: ModelCollector):
+        super().__init__(None)
+        self._collector = collector
+        self._n = len(collector)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return self._collector.ill_vertices(i)
+
+    def __len__(self) -> int:
+        return self._n
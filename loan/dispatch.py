@@ -0,0 +1,58 @@
+import math
+from itertools import count
+from typing import Dict, List, Tuple
+
+from mesa import Model
+
+
+class Dispatch:
+    """Bookkeeping of the killer nanites of a model, shared by all its factories.
+
+    - Reports of ill vertices are deduplicated per (target, disease): while a killer nanite for a report is
+      waiting or on its way, other reports of the same ill vertex and disease are dropped
+    - Factories queue their killer nanites on a heap, ordered by the `priority` of the policy:
+       - "wait": the tick of the report, the longest waiting report goes first
+       - "damage": the tick at which the target got ill, the vertex that has done the most damage goes first
+    - Factories spawn at most `spawn_rate` killer nanites per tick, None for no limit
+    - The time from report to heal of every healed vertex is kept in `latencies`
+    """
+    POLICIES = ("wait", "damage")
+
+    def __init__(self, model: Model, policy: str = "wait", spawn_rate: int = None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Invalid dispatch policy: {policy}")
+        if spawn_rate is not None and spawn_rate < 1:
+            raise ValueError(f"Invalid spawn_rate: {spawn_rate}")
+        self.model = model
+        self.policy = policy
+        self.spawn_rate = spawn_rate
+        self.sequence = count()  # Breaks ties between equal priorities, in order of report
+        self._reported: Dict[Tuple[int, str], int] = {}  # (target, disease) -> tick of the report
+        self.latencies: List[int] = []
+
+    def report(self, target: int, disease: str) -> bool:
+        """Registers the report of an ill vertex, False if it was already reported and not yet handled."""
+        if (target, disease) in self._reported:
+            return False
+        self._reported[target, disease] = self.model.schedule.steps
+        return True
+
+    def priority(self, target: int) -> int:
+        """Priority of a killer nanite for the given target, lowest goes first."""
+        if self.policy == "damage":
+            return int(self.model.vertex_state.infected_at[self.model.topology.index[target]])
+        return self.model.schedule.steps
+
+    def complete(self, target: int, disease: str, healed: bool) -> None:
+        """A killer nanite arrived at its target, which it healed if it was still ill."""
+        reported = self._reported.pop((target, disease), None)
+        if healed and reported is not None:
+            self.latencies.append(self.model.schedule.steps - reported)
+
+    def queue_length(self) -> int:
+        """Amount of killer nanites waiting in the queues of all factories."""
+        return sum(len(factory.nanite_queue) for factory in self.model.agent_factories)
+
+    def mean_latency(self) -> float:
+        """Mean amount of ticks from report to heal, NaN if nothing has been healed yet."""
+        return sum(self.latencies) / len(self.latencies) if self.latencies else math.nan
@@ -0,0 +1,121 @@
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+WITH_FLOW = 0
+AGAINST_FLOW = 1
+
+
+def _tree_levels(n: int, branching: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Depth, offset within its level and size of its level of every node of a complete tree in heap order."""
+    depth = np.zeros(n, dtype=np.int64)
+    offset = np.zeros(n, dtype=np.int64)
+    level_size = np.ones(n, dtype=np.int64)
+    start, size, d = 1, branching, 1
+    while start < n:
+        end = min(start + size, n)
+        depth[start:end] = d
+        offset[start:end] = np.arange(end - start)
+        level_size[start:end] = end - start
+        start, size, d = end, size * branching, d + 1
+    return depth, offset, level_size
+
+
+def _leaves(n: int, branching: int) -> np.ndarray:
+    """The leaves of a complete tree of n nodes in heap order."""
+    return np.arange(-(-(n - 1) // branching), n)
+
+
+def generate_network(n_vertices: int, branching: int = 2, shunt_fraction: float = 0.05,
+                     seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Generates a circulatory network of n_vertices vertices, numbered from 1, the heart being vertex 1.
+
+    Blood flows from the heart through a tree of arteries (every vessel splitting into `branching` vessels)
+    to the capillaries, which connect every arterial leaf to a venous leaf, and back through a tree of veins.
+    A `shunt_fraction` of n_vertices extra vessels connect random arteries to random veins.
+    Every vessel is a pair of edges in the format of `graph_from_json`: [from, to, 0] with the flow and
+    [to, from, 1] against it.
+
+    Returns the (edges, 3) edge array and the (n_vertices, 2) layout coordinates in [0, 1], row i holding the
+    coordinates of vertex i + 1, arteries on the left and veins on the right.
+    """
+    if n_vertices < 2:
+        raise ValueError(f"A network needs at least 2 vertices, got {n_vertices}")
+    if branching < 2:
+        raise ValueError(f"branching should be at least 2, got {branching}")
+    rng = np.random.default_rng(seed)
+
+    # Vertex indices 0..n_arteries-1 are the arterial tree with the heart as root, the rest the venous tree
+    n_arteries = (n_vertices + 1) // 2
+    n_veins = n_vertices - n_arteries
+    arteries = np.arange(1, n_arteries)
+    veins = np.arange(1, n_veins)
+
+    arterial_leaves = _leaves(n_arteries, branching)
+    venous_leaves = _leaves(n_veins, branching) + n_arteries
+    # Every arterial leaf drains into a venous leaf, and every venous leaf is fed by an arterial leaf
+    to_venous = venous_leaves[np.arange(len(arterial_leaves)) * len(venous_leaves) // len(arterial_leaves)]
+    from_arterial = arterial_leaves[np.arange(len(venous_leaves)) * len(arterial_leaves) // len(venous_leaves)]
+
+    n_shunts = int(shunt_fraction * n_vertices)
+    sources = np.concatenate(((arteries - 1) // branching,                  # Arteries, away from the heart
+                              n_arteries + veins,                            # Veins, towards the heart
+                              [n_arteries],                                  # Venous root into the heart
+                              arterial_leaves, from_arterial,                # Capillaries
+                              rng.integers(0, n_arteries, n_shunts)))        # Shunts
+    targets = np.concatenate((arteries,
+                              n_arteries + (veins - 1) // branching,
+                              [0],
+                              to_venous, venous_leaves,
+                              rng.integers(n_arteries, n_vertices, n_shunts)))
+
+    # Drop duplicate vessels, keeping the first
+    _, first = np.unique(sources * n_vertices + targets, return_index=True)
+    first.sort()
+    sources, targets = sources[first] + 1, targets[first] + 1
+
+    edges = np.empty((2 * len(sources), 3), dtype=np.int64)
+    edges[0::2] = np.column_stack((sources, targets, np.full(len(sources), WITH_FLOW)))
+    edges[1::2] = np.column_stack((targets, sources, np.full(len(sources), AGAINST_FLOW)))
+
+    # Layout: trees from left (heart) and right (venous root) towards the capillaries in the middle
+    positions = np.empty((n_vertices, 2), dtype=np.float64)
+    for start, n, side in ((0, n_arteries, 0.0), (n_arteries, n_veins, 1.0)):
+        depth, offset, level_size = _tree_levels(n, branching)
+        x = 0.45 * depth / max(depth.max(), 1)
+        positions[start:start+n, 0] = np.abs(side - x)
+        positions[start:start+n, 1] = (offset + 0.5) / level_size
+    return edges, positions
+
+
+def save_network(fp: Path, edges: np.ndarray, positions: np.ndarray = None) -> None:
+    """Saves a network to a binary .npz file, see `load_network`."""
+    arrays = {"edges": np.asarray(edges, dtype=np.int64)}
+    if positions is not None:
+        arrays["positions"] = np.asarray(positions, dtype=np.float64)
+    with open(fp, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def load_network(fp: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """Loads the edge array and the layout coordinates (None if not stored) of a network saved by `save_network`.
+    Use `Topology.from_edges` or `load_topology` to get a topology of it."""
+    with np.load(fp) as data:
+        return data["edges"], data["positions"] if "positions" in data else None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generates a circulatory network and saves it for `load_topology`")
+    parser.add_argument("n_vertices", type=int)
+    parser.add_argument("output", help=".npz file to write the network to")
+    parser.add_argument("--branching", type=int, default=2)
+    parser.add_argument("--shunt-fraction", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    edges, positions = generate_network(args.n_vertices, args.branching, args.shunt_fraction, args.seed)
+    save_network(args.output, edges, positions)
+    print(f"Saved {args.n_vertices} vertices and {len(edges)} edges to {args.output}")
@@ -0,0 +1,68 @@
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from loan.topology import Topology
+from loan.vertexstate import Illness, VertexState
+
+
+class HeatField:
+    """Keeps the heat values of a `VertexState` up to date while vertices get ill and healed.
+
+    The heat value of a vertex is:
+     - 1.0 if the vertex itself is ill
+     - 0.5 if one of its neighbors (the vertices it has an edge to) is ill
+     - 0.0 otherwise
+
+    For every vertex the amount of ill neighbors is counted. When a vertex changes, only the counts
+    of the vertices pointing to it are updated, found through a sparse (CSR) predecessor matrix.
+    Changing a vertex therefore costs O(degree) instead of rescanning the neighbors of its neighbors.
+    """
+    ILL_HEAT = 1.0
+    NEAR_ILL_HEAT = 0.5
+    HEALTHY_HEAT = 0.0
+
+    def __init__(self, state: VertexState, topology: Topology):
+        self.state = state
+        self.indptr, self.indices = topology.predecessor_csr
+        self.ill_neighbors = np.zeros(len(state), dtype=np.int32)  # Amount of ill neighbors per vertex
+
+    def _predecessors(self, idx: np.ndarray) -> np.ndarray:
+        """All predecessors of the given vertex indices, concatenated."""
+        if len(idx) == 1:
+            i = idx[0]
+            return self.indices[self.indptr[i]:self.indptr[i+1]]
+        return np.concatenate([self.indices[self.indptr[i]:self.indptr[i+1]] for i in idx])
+
+    def _refresh(self, idx: np.ndarray) -> None:
+        """Changes the ill status of the given vertex indices and recomputes the affected heat values."""
+        preds = self._predecessors(idx)
+        delta = np.where(self.state.is_ill[idx], 1, -1).astype(np.int32)
+        np.add.at(self.ill_neighbors, preds, np.repeat(delta, self.indptr[idx+1] - self.indptr[idx]))
+
+        affected = np.unique(np.concatenate((idx, preds)))
+        self.state.heat[affected] = np.where(self.state.is_ill[affected], self.ILL_HEAT,
+                                             np.where(self.ill_neighbors[affected] > 0, self.NEAR_ILL_HEAT,
+                                                      self.HEALTHY_HEAT))
+
+    def set_ill(self, vertices: Sequence[int], illnesses: Sequence[Illness]) -> None:
+        """Makes all given vertices ill, each with the corresponding illness."""
+        state = self.state
+        idx = np.fromiter((state.index[v] for v in vertices), dtype=np.int64, count=len(vertices))
+        changed = np.unique(idx[~state.is_ill[idx]])
+
+        state.is_ill[idx] = True
+        state.illness[idx] = illnesses
+        if len(changed):
+            self._refresh(changed)
+
+    def heal(self, vertices: Iterable[int]) -> None:
+        """Heals all given vertices."""
+        state = self.state
+        idx = np.fromiter((state.index[v] for v in vertices), dtype=np.int64)
+        changed = np.unique(idx[state.is_ill[idx]])
+
+        state.is_ill[idx] = False
+        state.illness[idx] = Illness.NONE
+        if len(changed):
+            self._refresh(changed)
@@ -1,9 +1,11 @@
-from collections import namedtuple
-from typing import List, Tuple
+from collections import deque, namedtuple
+from typing import Dict, List, Tuple
 
-import networkx as nx
+import numpy as np
 from mesa import Agent, Model
 
+from loan.perception import Perception
+
 NextState = namedtuple("NextState", ["target", "energy_cost"], defaults=[None, 0])
 
 class HelperAgent(Agent):
@@ -13,6 +15,10 @@ class HelperAgent(Agent):
      - Act
      - Update
     """
+    EMOJI = " 🕵️"  # How the agent is drawn, see `emojify`
+    __slots__ = ("unique_id", "model", "pos", "init_energy", "energy", "next_state", "perception", "percept_sequence",
+                 "_alert_for_disease_on_node", "going_with_the_flow")
+
     def __init__(self, unique_id: int, model: Model, pos: int, energy: int):
         super().__init__(unique_id, model)
         self.init_energy = energy
@@ -21,12 +27,26 @@ class HelperAgent(Agent):
         # self.model.grid.place_agent(self, self.pos)
         # Holds the information about the next move to make
         self.next_state = NextState()
-        self.perception = {}
-        self.percept_sequence = []  # Holds information about the visited Vertices
-        self.factory_location = self.model.factory_location
+        self.perception = Perception(self)
+        self.percept_sequence = self._new_memory()  # Holds information about the visited Vertices
         self.alert_for_disease_on_node = False  # (location, disease)
         self.going_with_the_flow = False
 
+    @property
+    def alert_for_disease_on_node(self):
+        """(location, disease) of the alert the agent carries to the factory, False if there's no alert."""
+        return self._alert_for_disease_on_node
+
+    @alert_for_disease_on_node.setter
+    def alert_for_disease_on_node(self, alert) -> None:
+        self._alert_for_disease_on_node = alert
+        self.model.grid.set_alert(self, bool(alert))  # Keeps the grid's index of alerting helpers up to date
+
+    @property
+    def factory_location(self) -> int:
+        """Location of the factory nearest to the agent, where it reports ill vertices."""
+        return self.model.nearest_factory[self.pos]
+
     def _move(self) -> None:
         """Moves the agent to the given vertex."""
         # self.pos = self.next_state.target
@@ -35,8 +55,20 @@ class HelperAgent(Agent):
     def _perceive_paths(self, target: int) -> List[List[int]]:
         """Finds all shortest paths to a given target vertex.
         The shortest path is the path with the least energy cost (least total weight).
+        With a perception radius, only paths within the radius are searched.
         """
-        return list(nx.all_shortest_paths(self.model.network, source=self.pos, target=target, weight="weight"))
+        radius = self.model.perception_radius
+        if radius is None:
+            return self.model.routing.paths(self.pos, target)
+        return self.model.routing.paths_within(self.pos, target, radius)
+
+    def _perceive_ill_vertices(self) -> List[int]:
+        """The ill vertices the agent can sense: all of them, or those within the perception radius, nearest first."""
+        radius = self.model.perception_radius
+        if radius is None:
+            return self.model.ill_vertices
+        ill_vertices = self.model.ill_vertices
+        return [vertex for vertex in self.model.routing.within(self.pos, radius) if vertex in ill_vertices]
 
     def _best_path(self, paths: List[List[int]]) -> Tuple[List[int], int, List[int]]:
         """Finds the best path of given paths.
@@ -58,7 +90,7 @@ class HelperAgent(Agent):
 
     def _path_cost(self, path: List[int]) -> List[int]:
         """Calculates the cost of a given path."""
-        return [self.model.network[path[i]][path[i+1]][0]["weight"] for i in range(len(path)-1)]
+        return self.model.routing.path_cost(path)
 
     def _get_neighbors_and_weights(self):
         """Gets neighbors and weights of current vertex."""
@@ -69,45 +101,69 @@ class HelperAgent(Agent):
 
     def _list_of_best_neighbors(self, neighbors: List[int]) -> List[int]:
         """Only keep all the neighbors with the best score based on heat value and cost."""
-        neighbors_with_heatvalue = list(filter(lambda n: self.model.cell_properties[n]["heat_value"] > 0.0, neighbors))
+        heat_value = self.model.vertex_state.heat_value
+        neighbors_with_heatvalue = list(filter(lambda n: heat_value(n) > 0.0, neighbors))
 
         if not neighbors_with_heatvalue:  # Path with lowest cost since there's no target
-            neigh_with_lowest_cost = min(neighbors, key=lambda n: self._path_cost([self.pos, n])[0])
-            lowest_cost = self._path_cost([self.pos, neigh_with_lowest_cost])[0]
-            filtered = list(filter(lambda n: self._path_cost([self.pos, n])[0] == lowest_cost, neighbors))
+            edge_cost = self.model.routing.edge_cost
+            lowest_cost = min(edge_cost(self.pos, n) for n in neighbors)
+            filtered = list(filter(lambda n: edge_cost(self.pos, n) == lowest_cost, neighbors))
         else:  # Path with highest heat value
-            neigh_with_highest_heat = max(neighbors, key=lambda n: self.model.cell_properties[n]["heat_value"])
-            highest_heat = self.model.cell_properties[neigh_with_highest_heat]["heat_value"]
-            filtered = list(filter(lambda n: self.model.cell_properties[n]["heat_value"] == highest_heat, neighbors))
+            highest_heat = max(heat_value(n) for n in neighbors)
+            filtered = list(filter(lambda n: heat_value(n) == highest_heat, neighbors))
         
         return filtered
 
+    def _new_memory(self):
+        """The memory of visited vertices for the model's memory_mode, see `perceive`."""
+        mode = self.model.memory_mode
+        if mode == "ring":
+            return deque(maxlen=self.model.memory_length)
+        if mode == "histogram":
+            return np.zeros(len(self.model.topology), dtype=np.uint32)
+        return None
+
+    def _perceive_neighbor_heat_values(self) -> Dict[int, float]:
+        heat_value = self.model.vertex_state.heat_value
+        return {neigh: heat_value(neigh) for neigh in self.model.get_neighbors(self.pos)}
+
     def perceive(self) -> None:
         """"The perception of the agent.
         Sees:
-          - Which vertices are ill. TODO: within N vertices in all directions.
+          - Which vertices are ill, within `model.perception_radius` hops (all of them if it is None).
           - If the vertex at the current position is ill.
-          - Shortest paths to all ill vertices.
+          - Shortest paths to the ill vertices it senses, within the perception radius.
+        The radius only bounds what is sensed and the searches behind it: `act` moves by the current vertex and the
+        heat of its neighbors, so runs are the same for every radius.
+        Only the current position is stored right away, the percepts are computed when they are read, see `Perception`.
         """
-        # Perceive current location on the graph
-        self.percept_sequence.append(self.pos)
-        # Perceive all the ill vertices from the environment
-        self.perception["ill_vertices"] = self.model.ill_vertices
-        # Perceive all possible shortest paths to all ill vertices
-        self.perception["shortest_paths_per_ill_vertex"] = [
-            self._perceive_paths(vert) for vert in self.perception["ill_vertices"]]
-        # Perceive if the current vertex is ill
-        # Boolean
-        self.perception["cur_pos_is_ill"] = self.model.cell_properties[self.pos]["is_ill"]
-        # Perceive the heat/inflammation value of the current vertex
-        # 0.0 <= x <= 1.0
-        self.perception["cur_pos_heat_value"] = self.model.cell_properties[self.pos]["heat_value"]
-        # Perceive the current type of illness if the vertex is ill
-        # String
-        self.perception["cur_pos_illness_type"] = self.model.cell_properties[self.pos]["illness_type"]
-        # Perceive the heat value of the neighboring vertices
-        self.perception["cur_pos_neighbor_heat_values"] = {neigh: self.model.cell_properties[neigh]["heat_value"]
-                                                           for neigh in self.model.get_neighbors(self.pos)}  # String
+        # Perceive current location on the graph, in the memory of the model's memory_mode:
+        #  - "ring": the last memory_length visited vertices
+        #  - "histogram": the amount of visits per vertex index
+        #  - "off": nothing
+        memory = self.percept_sequence
+        if memory is not None:
+            if self.model.memory_mode == "ring":
+                memory.append(self.pos)
+            else:
+                memory[self.model.topology.index[self.pos]] += 1
+        self.perception.clear()
+
+    PERCEPTS = {
+        # All the ill vertices from the environment
+        "ill_vertices": _perceive_ill_vertices,
+        # All possible shortest paths to all ill vertices
+        "shortest_paths_per_ill_vertex": lambda self: [self._perceive_paths(vert)
+                                                       for vert in self.perception["ill_vertices"]],
+        # If the current vertex is ill, boolean
+        "cur_pos_is_ill": lambda self: self.model.vertex_state.vertex_is_ill(self.pos),
+        # The heat/inflammation value of the current vertex, 0.0 <= x <= 1.0
+        "cur_pos_heat_value": lambda self: self.model.vertex_state.heat_value(self.pos),
+        # The current type of illness if the vertex is ill, string
+        "cur_pos_illness_type": lambda self: self.model.vertex_state.illness_type(self.pos),
+        # The heat value of the neighboring vertices
+        "cur_pos_neighbor_heat_values": _perceive_neighbor_heat_values,
+    }
 
     def act(self) -> None:
         """Action-selection based on perception.
@@ -124,18 +180,10 @@ class HelperAgent(Agent):
                 self.alert_for_disease_on_node = (self.pos, self.perception["cur_pos_illness_type"])
 
             # factory_location gets sick
-            if self.factory_location == self.pos:
-                self.next_state = NextState(target=self.pos, energy_cost=0)
-            else:
-                path, _, energy_costs = self._best_path(self._perceive_paths(self.factory_location))
-                self.next_state = NextState(target=path[1], energy_cost=energy_costs[0])
+            self.next_state = NextState(*self.model.routing.next_hop(self.pos, self.factory_location))
 
         elif self.alert_for_disease_on_node:
-            if self.factory_location == self.pos:
-                self.next_state = NextState(target=self.pos, energy_cost=0)
-            else:
-                path, _, energy_costs = self._best_path(self._perceive_paths(self.factory_location))
-                self.next_state = NextState(target=path[1], energy_cost=energy_costs[0])
+            self.next_state = NextState(*self.model.routing.next_hop(self.pos, self.factory_location))
 
         # Current vertex is not ill, so go with the flow!
         else:
@@ -145,7 +193,7 @@ class HelperAgent(Agent):
             best_neighbors = self._list_of_best_neighbors(neighbors)
             # Set the next state.
             new_target = self.model.random.choice(best_neighbors)
-            self.next_state = NextState(target=new_target, energy_cost=self._path_cost([self.pos, new_target])[0])
+            self.next_state = NextState(target=new_target, energy_cost=self.model.routing.edge_cost(self.pos, new_target))
 
         self.going_with_the_flow = self.next_state.energy_cost < 4  # Determine if the dynamo should recharge the helperagent
 
@@ -168,7 +216,7 @@ class HelperAgent(Agent):
             self.model.alive_helper_agents -= 1
     
     def emojify(self):
-        return " 🕵️"
+        return self.EMOJI
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__} {self.model}/{self.unique_id}: Energy {self.energy}: Position {self.pos}"
@@ -0,0 +1,194 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+from mesa import Agent, Model
+
+from loan.helperagent import HelperAgent
+from loan.vertexstate import ILLNESS_LABELS
+
+
+class HelperPopulation(Agent):
+    """All `HelperAgent`s of a model, stored as a struct-of-arrays and stepped at once with NumPy.
+    Follows the logic of `HelperAgent`, and produces the same results under the same seed.
+    Execution follows:
+     - Perceive
+     - Act
+     - Update
+
+    The population is scheduled as a single agent in place of the individual helpers.
+    Only the random choice between equally good neighbors is made per agent, in schedule order,
+    so the model's random stream is used exactly like it is by the individual agents.
+    """
+    RECHARGE = 3  # Energy gained by the dynamo when going with the flow
+    MAX_FLOW_COST = 4  # Moves cheaper than this recharge the dynamo
+
+    def __init__(self, unique_id: int, model: Model, positions: Sequence[int], energy: int):
+        super().__init__(unique_id, model)
+        state = model.vertex_state
+        self._vertices = state.vertices
+        self._index = state.index
+        self._build_neighbors()
+        self._init_routes_to_factories()
+
+        n = len(positions)
+        self.init_energy = energy
+        self.position = np.fromiter((self._index[p] for p in positions), dtype=np.int64, count=n)
+        self.energy = np.full(n, energy, dtype=np.int64)
+        self.alive = np.ones(n, dtype=bool)
+        self.alert_target = np.full(n, -1, dtype=np.int64)  # Vertex index of the alert, -1 if there's no alert
+        self.alert_illness = np.zeros(n, dtype=np.int8)
+        self.target = self.position.copy()
+        self.energy_cost = np.zeros(n, dtype=np.int64)
+        self.going_with_the_flow = np.zeros(n, dtype=bool)
+        self.cur_pos_is_ill = np.zeros(n, dtype=bool)
+        self.cur_pos_illness = np.zeros(n, dtype=np.int8)
+
+    def _build_neighbors(self) -> None:
+        """Gets the neighbors of all vertices in CSR form, in the order of `HumanModel.get_neighbors`,
+        with the energy cost of the edge to each neighbor."""
+        self._indptr, self._neighbors, self._neighbor_costs = self.model.topology.neighbor_csr
+        self._row_of_neighbor = np.repeat(np.arange(len(self._vertices)), np.diff(self._indptr))
+
+        # Neighbors with the lowest edge cost, the candidates when there is no heat around
+        lowest_cost = np.minimum.reduceat(self._neighbor_costs, self._indptr[:-1])
+        self._cheapest = self._neighbor_costs == lowest_cost[self._row_of_neighbor]
+
+    def _init_routes_to_factories(self) -> None:
+        """Table of the next vertex and energy cost towards the nearest factory per vertex index, -1 until known.
+        Every entry takes a shortest path search, so they are only filled in for the vertices agents report from,
+        see `_routes_to_factories`."""
+        self._factory_next = np.full(len(self._vertices), -1, dtype=np.int64)
+        self._factory_cost = np.zeros(len(self._vertices), dtype=np.int64)
+
+    def _routes_to_factories(self, positions: np.ndarray) -> None:
+        """Fills in the routes to the nearest factory from the given vertex indices, like `HelperAgent.act`."""
+        routing, nearest_factory = self.model.routing, self.model.nearest_factory
+        for i in np.unique(positions[self._factory_next[positions] < 0]).tolist():
+            vertex = self._vertices[i]
+            target, cost = routing.next_hop(vertex, nearest_factory[vertex])
+            self._factory_next[i] = self._index[target]
+            self._factory_cost[i] = cost
+
+    def _best_neighbors(self) -> np.ndarray:
+        """Marks per neighbor entry whether it is one of the best neighbors, like `HelperAgent._list_of_best_neighbors`."""
+        heat = self.model.vertex_state.heat[self._neighbors]
+        highest_heat = np.maximum.reduceat(heat, self._indptr[:-1])[self._row_of_neighbor]
+        return np.where(highest_heat > 0.0, heat == highest_heat, self._cheapest)
+
+    def perceive(self) -> None:
+        """Perceives for all agents if their current vertex is ill and with what illness."""
+        state = self.model.vertex_state
+        self.cur_pos_is_ill = state.is_ill[self.position]
+        self.cur_pos_illness = state.illness[self.position]
+
+    def act(self) -> None:
+        """Action-selection for all agents, see `HelperAgent.act`."""
+        alive = self.alive
+
+        # Agents on an ill vertex raise an alert, unless they already carry one
+        new_alert = alive & self.cur_pos_is_ill & (self.alert_target < 0)
+        self.alert_target[new_alert] = self.position[new_alert]
+        self.alert_illness[new_alert] = self.cur_pos_illness[new_alert]
+
+        # Agents with an alert go to the factory
+        to_factory = alive & (self.alert_target >= 0)
+        positions = self.position[to_factory]
+        self._routes_to_factories(positions)
+        self.target[to_factory] = self._factory_next[positions]
+        self.energy_cost[to_factory] = self._factory_cost[positions]
+
+        # Other agents go with the flow, choosing randomly between the best neighbors
+        wandering = np.flatnonzero(alive & ~to_factory)
+        if len(wandering):
+            best = self._best_neighbors()
+            choices: Dict[int, np.ndarray] = {}
+            choice = self.model.random.choice
+            for i in wandering:
+                vertex = self.position[i]
+                if vertex not in choices:
+                    start, end = self._indptr[vertex], self._indptr[vertex+1]
+                    choices[vertex] = np.flatnonzero(best[start:end]) + start
+                self.target[i] = choice(choices[vertex])
+            entries = self.target[wandering]
+            self.energy_cost[wandering] = self._neighbor_costs[entries]
+            self.target[wandering] = self._neighbors[entries]
+
+        self.going_with_the_flow = self.energy_cost < self.MAX_FLOW_COST
+
+    def update(self) -> None:
+        """Moves all agents, drains and recharges their energy and removes the agents without energy."""
+        alive = self.alive
+        self.position[alive] = self.target[alive]
+        self.energy[alive] -= self.energy_cost[alive]
+
+        recharging = alive & self.going_with_the_flow
+        self.energy[recharging] = np.minimum(self.energy[recharging] + self.RECHARGE, self.init_energy)
+
+        # Let the grid know where agents with an alert are, e.g. to wake a factory
+        alerting = alive & (self.alert_target >= 0)
+        if alerting.any():
+            for i in np.unique(self.position[alerting]).tolist():
+                self.model.grid.alert_raised(self._vertices[i])
+
+        died = alive & (self.energy <= 0)
+        if died.any():
+            self.alive[died] = False
+            self.model.alive_helper_agents -= int(died.sum())
+
+    def total_energy(self) -> int:
+        """Total energy of the agents that are alive."""
+        return int(self.energy[self.alive].sum())
+
+    def occupied(self) -> List[int]:
+        """The vertices with at least one agent that is alive on them."""
+        return [self._vertices[i] for i in np.unique(self.position[self.alive])]
+
+    def members_at(self, vertex: int) -> List["PopulationMember"]:
+        """The agents that are alive on the given vertex, in schedule order."""
+        i = self._index[vertex]
+        return [PopulationMember(self, j) for j in np.flatnonzero(self.alive & (self.position == i))]
+
+    def alerting_at(self, vertex: int) -> List["PopulationMember"]:
+        """The agents that are alive on the given vertex and carry an alert, in schedule order."""
+        i = self._index[vertex]
+        members = np.flatnonzero(self.alive & (self.position == i) & (self.alert_target >= 0))
+        return [PopulationMember(self, j) for j in members]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} {self.model}/{self.unique_id}: Alive {int(self.alive.sum())}"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+
+class PopulationMember:
+    """Handle on a single agent of a `HelperPopulation`, exposing the attributes other agents read of a `HelperAgent`."""
+
+    def __init__(self, population: HelperPopulation, i: int):
+        self.population = population
+        self.i = i
+
+    @property
+    def pos(self) -> int:
+        return self.population._vertices[self.population.position[self.i]]
+
+    @property
+    def energy(self) -> int:
+        return int(self.population.energy[self.i])
+
+    @property
+    def alert_for_disease_on_node(self):
+        """(location, disease) of the alert, False if there's no alert."""
+        target = self.population.alert_target[self.i]
+        if target < 0:
+            return False
+        return self.population._vertices[target], ILLNESS_LABELS[self.population.alert_illness[self.i]]
+
+    @alert_for_disease_on_node.setter
+    def alert_for_disease_on_node(self, value) -> None:
+        if value:
+            raise ValueError("Alerts of a HelperPopulation can only be reset")
+        self.population.alert_target[self.i] = -1
+
+    def emojify(self):
+        return HelperAgent.EMOJI
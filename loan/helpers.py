@@ -1,11 +1,48 @@
+import hashlib
 import json
 import operator
+import os
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
 
+# Directory for the compiled networks, see `load_network_edges`
+CACHE_DIR = Path(os.environ.get("LOAN_CACHE_DIR", Path.home() / ".cache" / "loan"))
+
+
+def load_network_edges(fp: Path, use_cache: bool = True) -> np.ndarray:
+    """Loads the `network` edge array of the given json file.
+
+    The parsed array is stored in `CACHE_DIR` as a binary file, keyed by the hash of the json file,
+    so later loads of the same file skip parsing the json. The cache is skipped if it cannot be written.
+    """
+    with open(fp, "rb") as f:
+        raw = f.read()
+    cache_file = CACHE_DIR / f"network-{hashlib.sha256(raw).hexdigest()}.npy"
+
+    if use_cache:
+        try:
+            return np.load(cache_file)
+        except (OSError, ValueError):
+            pass
+
+    network = np.array(json.loads(raw).get("network"), dtype=int)
+
+    if use_cache:
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, "wb") as f:
+                np.save(f, network)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+        finally:
+            # Only left behind by a failed write
+            tmp_file.unlink(missing_ok=True)
+    return network
+
 
 def graph_from_json(fp: Path, against_weight: int = 6, with_weight: int = 2, name: str = "HumanBody"):
     """Loads a graph from given filepath.
@@ -15,19 +52,31 @@ def graph_from_json(fp: Path, against_weight: int = 6, with_weight: int = 2, nam
     The third element indicates if the edge is going with or against the stream.
     With is indicated by `0`. Against is indicated by `1`.
     """
-    with open(fp) as f:
-        network = np.array(json.load(f).get("network"), dtype=int)
+    return graph_from_edges(load_network_edges(fp), against_weight, with_weight, name)
 
-    # Change all weights to corresponding energy cost
-    network[:, 2] = np.where(network[:, 2] == 0, with_weight, against_weight)
+
+def graph_from_edges(network: np.ndarray, against_weight: int = 6, with_weight: int = 2, name: str = "HumanBody",
+                     vertices=None):
+    """Builds a graph from an edge array in the format of `graph_from_json`.
+    The vertices are added in the given order first, if given."""
+    network = edge_costs(network, against_weight, with_weight)
 
     # Building and filling the graph
     graph = nx.MultiDiGraph(name=name)
+    if vertices is not None:
+        graph.add_nodes_from(vertices)
     graph.add_weighted_edges_from(network.tolist())  # Instantiate all edges with corresponding weights
 
     return graph
 
 
+def edge_costs(network: np.ndarray, against_weight: int = 6, with_weight: int = 2) -> np.ndarray:
+    """Copy of an edge array in the format of `graph_from_json` with the directions replaced by energy costs."""
+    network = np.array(network, dtype=int)
+    network[:, 2] = np.where(network[:, 2] == 0, with_weight, against_weight)
+    return network
+
+
 def give_node_positions():
     """Returns the node positions."""
     pos = {14: (1, 0), 12: (1, 1), 13: (0, 1), 11: (2, 1), 10: (1, 2), 9: (2, 2), 8: (0, 3),
@@ -59,6 +108,8 @@ def plot_graph(graph):
     """Plots the given graph.
     For each tuple in pos-dictionairy, tuple[0] is the x-value, tuple[1] is the y-value.
     """
+    import matplotlib.pyplot as plt  # Only needed for plotting, so not imported with the module
+
     pos = give_node_positions()
 
     # Draw all vertices and edges.
@@ -74,5 +125,5 @@ def plot_graph(graph):
 
 
 if __name__ == "__main__":
-    graph = graph_from_json(Path("./loan/network.json"))
+    graph = graph_from_json(Path(__file__).parent / "data" / "network.json")
     plot_graph(graph)
@@ -0,0 +1,196 @@
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+from loan.scheduler import ActivityScheduler
+
+# Columns added to the model's collector, holding the totals since the previous collected step,
+# so with a collect_interval above 1 every column covers the same steps
+INSTRUMENTATION_COLUMNS = ("Step time", "Perceive time", "Act time", "Update time",
+                           "Path queries", "Neighbor lookups", "Grid moves")
+PATH_QUERIES = ("routing.paths", "routing.best_path", "routing.next_hop", "routing.nearest", "routing.within",
+                "routing.paths_within")
+
+
+class Instrumentation:
+    """Profiling of a single `HumanModel`, switched on with `HumanModel(instrument=True)`.
+
+    Records:
+     - the wall time per stage and agent class, through an `InstrumentedActivityScheduler`
+     - the wall time of the phases of a step: the environment (hurting, infecting), the schedule and collecting data
+     - the amount of calls of the expensive primitives: routing queries, neighbor lookups and grid moves
+
+    Everything is hooked into the model when it is created; a model without instrumentation runs its
+    normal code paths, so switching it off costs nothing. The hooks are instances of module-level classes,
+    so an instrumented model can be pickled like any other.
+    """
+
+    def __init__(self):
+        self.stage_times: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.stage_calls: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.phase_times: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.steps = 0
+        self.last_step: Dict[str, float] = dict.fromkeys(INSTRUMENTATION_COLUMNS, 0.0)
+        self._step_start = None
+        self._previous: Dict[str, float] = {}
+
+    def counted(self, name: str, function: Callable) -> "Counted":
+        """Wraps the function so its calls are counted under name."""
+        return Counted(self.counters, name, function)
+
+    def attach(self, model) -> None:
+        """Hooks the instrumentation into the routing, neighbor lookups, grid and step of the model.
+        The schedule is created by the model itself, as an `InstrumentedActivityScheduler`."""
+        model.routing = CountingRoutingTable(model.routing, self)
+        model.get_neighbors = self.counted("get_neighbors", model.get_neighbors)
+        grid = model.grid
+        grid.move_agent = self.counted("grid.move_agent", grid.move_agent)
+        grid.place_agent = self.counted("grid.place_agent", grid.place_agent)
+        model.step = TimedStep(self, model.step)
+
+    def attach_collector(self, collector) -> None:
+        """Times the collector and adds the INSTRUMENTATION_COLUMNS to it."""
+        collector.collect = TimedCollect(self, collector)
+        for name in INSTRUMENTATION_COLUMNS:
+            collector.add_column(name, StepValue(name))
+
+    def _totals(self, now: float) -> Dict[str, float]:
+        totals = defaultdict(float)
+        # The finished steps, plus the running one up to now
+        totals["Step time"] = self.phase_times["step"] + (now - self._step_start if self._step_start is not None else 0.0)
+        for (stage, _), seconds in self.stage_times.items():
+            totals[f"{stage.capitalize()} time"] += seconds
+        totals["Path queries"] = sum(self.counters[name] for name in PATH_QUERIES)
+        totals["Neighbor lookups"] = self.counters["get_neighbors"]
+        totals["Grid moves"] = self.counters["grid.move_agent"]
+        return totals
+
+    def _snapshot(self, now: float) -> None:
+        """Updates `last_step` with the values since the previous snapshot."""
+        totals = self._totals(now)
+        self.last_step = {name: totals[name] - self._previous.get(name, 0.0) for name in INSTRUMENTATION_COLUMNS}
+        self._previous = totals
+
+    def report(self) -> Dict[str, object]:
+        """The recorded times (in seconds) and counts of the run so far."""
+        stages: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(dict)
+        for (stage, cls), seconds in self.stage_times.items():
+            stages[stage][cls] = {"time": seconds, "calls": self.stage_calls[stage, cls]}
+        step_time = self.phase_times["step"]
+        schedule_time = self.phase_times["schedule"]
+        collect_time = self.phase_times["collect"]
+        return {"steps": self.steps,
+                "phases": {"step": step_time, "environment": step_time - schedule_time - collect_time,
+                           "schedule": schedule_time, "collect": collect_time},
+                "stages": dict(stages),
+                "counters": dict(self.counters)}
+
+    def format_report(self) -> str:
+        """The report as a readable table."""
+        report = self.report()
+        steps = max(report["steps"], 1)
+        lines = [f"{report['steps']} steps"]
+        for phase, seconds in report["phases"].items():
+            lines.append(f"  {phase:<32} {seconds * 1000:12.3f} ms  {seconds / steps * 1000:10.4f} ms/step")
+        for stage, classes in report["stages"].items():
+            for cls, values in sorted(classes.items()):
+                lines.append(f"  {stage + ' ' + cls:<32} {values['time'] * 1000:12.3f} ms  {values['calls']:10d} calls")
+        for name, calls in sorted(report["counters"].items()):
+            lines.append(f"  {name:<32} {calls:12d} calls  {calls / steps:10.2f} /step")
+        return "\n".join(lines)
+
+
+class Counted:
+    """Function that counts its calls under name in counters, see `Instrumentation.counted`."""
+
+    def __init__(self, counters: Dict[str, int], name: str, function: Callable):
+        self.counters = counters
+        self.name = name
+        self.function = function
+
+    def __call__(self, *args, **kwargs):
+        self.counters[self.name] += 1
+        return self.function(*args, **kwargs)
+
+
+class TimedStep:
+    """Step of an instrumented model, see `Instrumentation.attach`."""
+
+    def __init__(self, instrumentation: Instrumentation, step: Callable[[], None]):
+        self.instrumentation = instrumentation
+        self.step = step
+
+    def __call__(self) -> None:
+        instrumentation = self.instrumentation
+        instrumentation._step_start = time.perf_counter()
+        self.step()
+        instrumentation.phase_times["step"] += time.perf_counter() - instrumentation._step_start
+        instrumentation.steps += 1
+
+
+class TimedCollect:
+    """Collect of the collector of an instrumented model, see `Instrumentation.attach_collector`.
+    Only the collected steps take a snapshot, so the columns of a row cover all steps since the previous row."""
+
+    def __init__(self, instrumentation: Instrumentation, collector):
+        self.instrumentation = instrumentation
+        self.collector = collector
+        self.collect = collector.collect
+
+    def __call__(self, model) -> None:
+        start = time.perf_counter()
+        if self.collector.is_due(model):
+            self.instrumentation._snapshot(start)
+        self.collect(model)
+        self.instrumentation.phase_times["collect"] += time.perf_counter() - start
+
+
+class StepValue:
+    """Reporter of an instrumentation column, see `Instrumentation.attach_collector`."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self, model) -> float:
+        return model.instrumentation.last_step[self.name]
+
+
+class CountingRoutingTable:
+    """Stands in for the `RoutingTable` of an instrumented model and counts the queries made to it."""
+    COUNTED = ("paths", "best_path", "next_hop", "edge_cost", "path_cost", "nearest", "within", "paths_within")
+
+    def __init__(self, routing, instrumentation: Instrumentation):
+        self._routing = routing
+        for name in self.COUNTED:
+            setattr(self, name, instrumentation.counted(f"routing.{name}", getattr(routing, name)))
+
+    def __getattr__(self, name: str):
+        if name == "_routing":  # Not set yet while unpickling
+            raise AttributeError(name)
+        return getattr(self._routing, name)
+
+
+class InstrumentedActivityScheduler(ActivityScheduler):
+    """ActivityScheduler that records the wall time of every stage per agent class."""
+
+    def __init__(self, model, stage_list: List[str], instrumentation: Instrumentation) -> None:
+        super().__init__(model, stage_list)
+        self.instrumentation = instrumentation
+
+    def _run_stage(self, stage: str, agents: List) -> None:
+        """Calls the given agents for the stage, timing every call."""
+        timer = time.perf_counter
+        times, calls = self.instrumentation.stage_times, self.instrumentation.stage_calls
+        for agent in agents:
+            agent_start = timer()
+            getattr(agent, stage)()  # Run stage
+            key = stage, type(agent).__name__
+            times[key] += timer() - agent_start
+            calls[key] += 1
+
+    def step(self) -> None:
+        """Executes the stages, timing every call."""
+        start = time.perf_counter()
+        super().step()
+        self.instrumentation.phase_times["schedule"] += time.perf_counter() - start
@@ -16,25 +16,33 @@ const GraphModule = function (canvas_width, canvas_height) {
     };
 
     this.render = function (data) {
-        let graph = JSON.parse(JSON.stringify(data));
-
-        // Update the instance's graph:
-        if (s instanceof sigma) {
-            s.graph.clear();
-            s.graph.read(graph);
+        if (data.type === "full") {
+            let graph = JSON.parse(JSON.stringify({nodes: data.nodes, edges: data.edges}));
+
+            // Update the instance's graph:
+            if (s instanceof sigma) {
+                s.graph.clear();
+                s.graph.read(graph);
+            }
+            // ...or instantiate sigma if needed:
+            else if (typeof s === 'object') {
+                s.graph = graph;
+                s = new sigma(s);
+            }
         }
-        // ...or instantiate sigma if needed:
-        else if (typeof s === 'object') {
-            s.graph = graph;
-            s = new sigma(s);
+        // A delta only holds the nodes that changed since the previous frame
+        else if (s instanceof sigma) {
+            data.nodes.forEach(function (change) {
+                let node = s.graph.nodes(change.id);
+                if (node !== undefined) {
+                    node.color = change.color;
+                    node.label = change.label;
+                }
+            });
+        }
+        else {
+            return;
         }
-
-        // //Initialize nodes as a circle
-        // s.graph.nodes().forEach(function(node, i, a) {
-        //     console.log(node);
-        //     node.x = Math.cos(Math.PI * 2 * i / a.length);
-        //     node.y = Math.sin(Math.PI * 2 * i / a.length);
-        // });
 
         //Call refresh to render the new graph
         s.refresh();
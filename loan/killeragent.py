@@ -1,34 +1,61 @@
-from collections import namedtuple
+from typing import List
 
-import networkx as nx
 from mesa import Agent, Model
 
 
 class KillerAgent(Agent):
+    """Killer nanite, walks from its factory to an ill vertex and heals it.
+    The route is planned once, when the killer is created: the best weighted path of the model's routing table,
+    which is shared by all killers with the same start and target.
+    With the model's cancel_stale_killers, a killer whose target was healed in the meantime stops on the spot.
+    Killers are created through the model's `KillerPool`, which reuses the killers that are done.
+    Killers only need the update stage, and the perceive stage to notice a healed target with cancel_stale_killers.
+    """
+    EMOJI = " 💉"
+    __slots__ = ("unique_id", "model", "pos", "creator", "target_location", "target_disease", "arrived_on_location",
+                 "cancelled", "route", "route_index")
+
     def __init__(self, unique_id: int, model: Model, creator, pos: int, target_location: int, target_disease: str) -> None:
         super().__init__(unique_id, model)
+        self._start(creator, pos, target_location, target_disease)
+
+    def _start(self, creator, pos: int, target_location: int, target_disease: str) -> None:
+        """Sets the killer up for a new target."""
         self.creator = creator
         self.pos = pos
         self.target_location = target_location
         self.target_disease = target_disease
         self.arrived_on_location = False
-        self.shortest_path_to_target_node = []
+        self.cancelled = False
+        self.route = self.model.routing.best_path(pos, target_location).path  # Shared, should not be modified
+        self.route_index = 0  # Index of the current position on the route
+
+    @property
+    def stages(self):
+        """The stages the killer takes part in, see `ActivityScheduler`."""
+        return ("perceive", "update") if self.model.cancel_stale_killers else ("update",)
 
     def perceive(self) -> None:
-        self.arrived_on_location = self.pos == self.target_location
-        self.shortest_path_to_target_node = nx.shortest_path(G=self.model.network, source=self.pos, target=self.target_location)
+        self.arrived_on_location = self.route_index == len(self.route) - 1
+        self.cancelled = (self.model.cancel_stale_killers and not self.arrived_on_location
+                          and not self.model.vertex_state.vertex_is_ill(self.target_location))
 
     def act(self) -> None:
         ...
 
     def update(self) -> None:
-        if self.arrived_on_location:
-            if self.pos in self.model.ill_vertices:
+        self.arrived_on_location = self.route_index == len(self.route) - 1  # Known without perceiving
+        if self.arrived_on_location or self.cancelled:
+            healed = self.arrived_on_location and self.pos in self.model.ill_vertices
+            if healed:
                 self.model.restore_vertex(self.pos)
+            self.model.dispatch.complete(self.target_location, self.target_disease, healed)
             self.model.grid._remove_agent(self, self.pos)
             self.model.schedule.remove(self)
+            self.model.killer_pool.release(self)
         else:
-            self.model.grid.move_agent(self, self.shortest_path_to_target_node[1])
+            self.route_index += 1
+            self.model.grid.move_agent(self, self.route[self.route_index])
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__} {self.model}/{self.unique_id}: Position {self.pos}"
@@ -37,4 +64,35 @@ class KillerAgent(Agent):
         return self.__repr__()
     
     def emojify(self):
-        return " 💉"
\ No newline at end of file
+        return self.EMOJI
+
+
+class KillerPool:
+    """Free list of the killer nanites of a model that are done, reused for new killers instead of creating new objects.
+    A reused killer gets a new id, so every killer the factories produce is a distinct agent to the schedule and the
+    recorder.
+    """
+
+    def __init__(self, model: Model) -> None:
+        self.model = model
+        self._free: List[KillerAgent] = []
+        self.created = 0  # Killers created
+        self.reused = 0   # Killers taken from the free list
+
+    def acquire(self, creator, pos: int, target_location: int, target_disease: str) -> KillerAgent:
+        """A killer nanite for the given target, at pos."""
+        if self._free:
+            killer = self._free.pop()
+            killer.unique_id = self.model.next_id()
+            killer._start(creator, pos, target_location, target_disease)
+            self.reused += 1
+            return killer
+        self.created += 1
+        return KillerAgent(self.model.next_id(), self.model, creator, pos, target_location, target_disease)
+
+    def release(self, killer: KillerAgent) -> None:
+        """Takes back a killer that has been removed from the grid and the schedule."""
+        self._free.append(killer)
+
+    def __len__(self) -> int:
+        return len(self._free)
@@ -1,18 +1,25 @@
-import copy
+import random
+from collections.abc import Iterable
+from functools import partial
 from pathlib import Path
-from typing import List
-from uuid import uuid1
+from typing import List, Sequence, Union
 
 import networkx as nx
 from mesa import Model
-from mesa.datacollection import DataCollector
-from mesa.space import NetworkGrid
-from mesa.time import StagedActivation
 
 from loan.agentfactory import AgentFactory
+from loan.collector import ModelCollector
+from loan.dispatch import Dispatch
 from loan.greedyhelperagent import GreedyHelperAgent
+from loan.heatfield import HeatField
 from loan.helperagent import HelperAgent
-from loan.helpers import graph_from_json
+from loan.helperpopulation import HelperPopulation
+from loan.instrumentation import Instrumentation, InstrumentedActivityScheduler
+from loan.killeragent import KillerAgent, KillerPool
+from loan.scheduler import ActivityScheduler
+from loan.space import OccupancyGrid, ReservationTable
+from loan.topology import Topology, load_topology
+from loan.vertexstate import IllVertexSet, Illness, VertexState
 
 
 class HumanModel(Model):
@@ -26,21 +33,72 @@ class HumanModel(Model):
     ILLNESS_CHANCE = 0.2
     MAX_ILL_VERTICES = 4
     NUM_AGENTS = 1
-    GRAPH = graph_from_json(Path("./loan/data/network.json"))
+    DISPATCH_REPORTERS = ("Dispatch queue", "Mean heal latency")
+    DATA_REPORTERS = ModelCollector.COLUMNS + DISPATCH_REPORTERS  # Collected every step
+    NETWORK = Path(__file__).parent / "data" / "network.json"  # Loaded on the first model that uses it
+
+    def __init__(self, N: int = NUM_AGENTS, network: Union[Topology, nx.MultiDiGraph] = None, hitpoints: int = INIT_HITPOINTS,
+                 illness_chance: float = ILLNESS_CHANCE, max_ill_vertices: int = MAX_ILL_VERTICES,
+                 factory_location: Union[int, Sequence[int]] = None,
+                 max_helperagent_energy: int = INIT_ENERGY_HELPERAGENT, helper_type: str = "helperagent",
+                 helper_engine: str = "object", dispatch_policy: str = "wait", spawn_rate: int = None,
+                 cancel_stale_killers: bool = False, seed: int = None, collect_data: bool = True, collect_interval: int = 1,
+                 instrument: bool = False, legacy_infection_sampling: bool = False, perception_radius: int = None,
+                 memory_mode: str = "ring", memory_length: int = 100):
+        # Mesa keeps the random number generator on the class, give every model its own
+        self._seed = seed
+        self.random = random.Random(seed)
+        self.current_id = 0  # Last agent id handed out by `next_id`
+
+        # The topology is shared between models, the agents on the vertices are kept by the model's own grid.
+        # Models given the same graph share its topology, see `Topology.of_graph`
+        if network is None:
+            self.topology = load_topology(self.NETWORK)
+        elif isinstance(network, Topology):
+            self.topology = network
+        else:
+            self.topology = Topology.of_graph(network)
 
-    def __init__(self, N: int = NUM_AGENTS, network: nx.MultiDiGraph = GRAPH, hitpoints: int = INIT_HITPOINTS,
-                 illness_chance: float = ILLNESS_CHANCE, max_ill_vertices: int = MAX_ILL_VERTICES, factory_location: int = None,
-                 max_helperagent_energy: int = INIT_ENERGY_HELPERAGENT, helper_type: str = "helperagent"):
         self.num_agents = N
         self.hitpoints = hitpoints
         self._illness_chance = illness_chance
-        self._max_ill_vertices = min(max_ill_vertices, len(network.nodes))
-        self.network: nx.MultiDiGraph = network
-        self.grid = NetworkGrid(self.network)
-        self.ill_vertices = []
+        self._max_ill_vertices = min(max_ill_vertices, len(self.topology))
+        self.network: nx.MultiDiGraph = self.topology.graph
+        self.grid = OccupancyGrid(self.network)
+        self.reservations = ReservationTable(self)  # Neighbors taken by the greedy helpers, per vertex and tick
+        self.routing = self.topology.routing  # Shortest paths between vertices, shared by all agents
+        # Ill vertices in the order they got ill, with O(1) membership, removal and sampling of a healthy vertex
+        self.ill_vertices = IllVertexSet(self.topology.vertices, self.topology.index)
+        # Draw the vertex to infect as older versions did, reproducing their runs at O(vertices) per infection
+        self.legacy_infection_sampling = legacy_infection_sampling
+        # Helpers sense ill vertices, and search paths to them, within this many hops, None for the whole graph.
+        # This only trims the percepts, helpers don't act on them, so the radius doesn't change how a run goes
+        if perception_radius is not None and perception_radius < 0:
+            raise ValueError(f"Invalid perception_radius: {perception_radius}")
+        self.perception_radius = perception_radius
+        # What helpers remember of the vertices they visited: "off", the last memory_length ("ring") or visit counts
+        if memory_mode not in ("off", "ring", "histogram"):
+            raise ValueError(f"Invalid memory_mode: {memory_mode}")
+        self.memory_mode = memory_mode
+        self.memory_length = memory_length
         model_stages = ["perceive", "act", "update"]
-        self.schedule = StagedActivation(self, stage_list=model_stages)
-        self.factory_location = self.random.choice(list(network.nodes)) if factory_location is None else factory_location
+
+        # Opt-in profiling of the stages and the expensive primitives, see `Instrumentation`
+        self.instrumentation = Instrumentation() if instrument else None
+        if self.instrumentation is not None:
+            self.schedule = InstrumentedActivityScheduler(self, model_stages, self.instrumentation)
+            self.instrumentation.attach(self)
+        else:
+            self.schedule = ActivityScheduler(self, stage_list=model_stages)
+        # One or more factories, helpers report to the one nearest to them
+        if factory_location is None:
+            factory_location = self.random.choice(self.topology.vertices)
+        self.factory_locations = tuple(dict.fromkeys(factory_location if isinstance(factory_location, Iterable)
+                                                     else [factory_location]))
+        if not self.factory_locations or any(v not in self.topology.index for v in self.factory_locations):
+            raise ValueError(f"Invalid factory_location: {factory_location}")
+        self.factory_location = self.factory_locations[0]
+        self.nearest_factory = self.routing.nearest(self.factory_locations)  # Vertex -> nearest factory location
         self.healed_count = 0  # Amount of healed vertices at end of simulation
         self.alive_helper_agents = 0
         self.total_energy_agents = 0
@@ -54,83 +112,83 @@ class HumanModel(Model):
         else:
             raise ValueError("Invalid helper_type: {helper_type}")
 
-        # store the properties of the vertices into an dictionary
-        props = {"heat_value": 0.0,    # float -> between 1.0 and 0.0
-                 "is_ill": False,      # bool -> if the current vertex is ill
-                 "illness_type": None  # str -> current illness (if the vertex is ill)
-                 }  
+        # "object" steps every helper agent on its own, "vectorized" steps all of them at once in a HelperPopulation
+        helper_engine = helper_engine.lower()
+        if helper_engine not in ("object", "vectorized"):
+            raise ValueError(f"Invalid helper_engine: {helper_engine}")
+        if helper_engine == "vectorized" and self.helper_type is not HelperAgent:
+            raise ValueError("helper_engine 'vectorized' only supports helper_type 'helperagent'")
+        self.helper_population = None
 
-        self.cell_properties = {x: copy.deepcopy(props) for x in self.network.nodes}
+        # store the properties of the vertices (heat_value, is_ill, illness) into arrays
+        self.vertex_state = VertexState(self.topology.vertices, self.topology.index)
+        self.cell_properties = self.vertex_state.view()  # Read-only dictionary-like view on vertex_state
+        self.heat_field = HeatField(self.vertex_state, self.topology)
 
         # create agents
-        for _ in range(self.num_agents):
-            # spawn agent on random node
-            node_to_spawn = self.random.choice(list(self.network.nodes))
-            agent = self.helper_type(uuid1().int, self, node_to_spawn, self.max_helperagent_energy)
-            self.grid.place_agent(agent, node_to_spawn)
-            self.alive_helper_agents += 1
-            # add to schedule
-            self.schedule.add(agent)
-
-        agentfactory = AgentFactory(uuid1().int, self, self.factory_location)
-        self.grid.place_agent(agentfactory, agentfactory.pos)
-        self.schedule.add(agentfactory)
-
-        self.datacollector = DataCollector(model_reporters={
-            "Hitpoints": "hitpoints",
-            "Ill vertices": "ill_vertices",
-            "Helper Agents alive": "alive_helper_agents",
-            "Helper Agents energy": "total_energy_agents"
-        })
+        if helper_engine == "vectorized":
+            # spawn agents on random nodes
+            nodes_to_spawn = [self.random.choice(self.topology.vertices) for _ in range(self.num_agents)]
+            self.helper_population = HelperPopulation(self.next_id(), self, nodes_to_spawn, self.max_helperagent_energy)
+            self.alive_helper_agents += self.num_agents
+            self.schedule.add(self.helper_population)
+        else:
+            for _ in range(self.num_agents):
+                # spawn agent on random node
+                node_to_spawn = self.random.choice(self.topology.vertices)
+                agent = self.helper_type(self.next_id(), self, node_to_spawn, self.max_helperagent_energy)
+                self.grid.place_agent(agent, node_to_spawn)
+                self.alive_helper_agents += 1
+                # add to schedule
+                self.schedule.add(agent)
+
+        # The factories share their knowledge of the diseases and the queue of reported ill vertices
+        self.library_of_diseases = []
+        self.dispatch = Dispatch(self, dispatch_policy, spawn_rate)
+        self.cancel_stale_killers = cancel_stale_killers  # Killers stop when their target is healed before they arrive
+        self.killer_pool = KillerPool(self)  # Killers that are done, reused by the factories
+        self.agent_factories = [AgentFactory(self.next_id(), self, location, self.library_of_diseases)
+                                for location in self.factory_locations]
+        for agent_factory in self.agent_factories:
+            self.grid.place_agent(agent_factory, agent_factory.pos)
+            self.schedule.add(agent_factory)
+            # An idle factory sleeps until a helper with an alert shows up on its vertex
+            self.grid.watch_alerts(agent_factory.pos, partial(self.schedule.wake, agent_factory))
+        self.agent_factory = self.agent_factories[0]
+
+        # Collects DATA_REPORTERS every collect_interval steps, collect_data=False switches collecting off (e.g. in batches)
+        self.datacollector = ModelCollector(self.topology.vertices, interval=collect_interval, enabled=collect_data)
+        self.datacollector.add_column("Dispatch queue", HumanModel.get_dispatch_queue_length)
+        self.datacollector.add_column("Mean heal latency", HumanModel.get_mean_heal_latency)
+        if self.instrumentation is not None:
+            self.instrumentation.attach_collector(self.datacollector)
         self.running = True
 
     def hurt(self):
         """Remove len(ill_verticies) from the model's hitpoints."""
         self.hitpoints -= len(self.ill_vertices)
 
-    def _get_random_sickness(self) -> str:
+    def _get_random_sickness(self) -> Illness:
         """Chooses a random sickness to return."""
-        illness = ["clapitalism", "kovid++", "Caring Too Muche", "Cutie Pox"]
+        illness = [Illness.CLAPITALISM, Illness.KOVID, Illness.CARING_TOO_MUCHE, Illness.CUTIE_POX]
         return self.random.choice(illness)
 
     def _update_illness_status(self, vertex: int, is_healed: bool):
-        """Updates the properties of one cell based on if it is healed and the illness of the neighbors."""
-
+        """Updates the properties of one cell and the heat_values of its surroundings based on if it is healed."""
         if is_healed:
-            self.cell_properties.get(vertex)["is_ill"] = False
-            self.cell_properties.get(vertex)["illness_type"] = None
-
-            if any(self.cell_properties.get(n).get("is_ill") for n in self.get_neighbors(vertex)):
-                # A neighboring cell is ill, so heat_value cannot be changed to 0.0
-                self.cell_properties.get(vertex)["heat_value"] = 0.5
-            else:
-                self.cell_properties.get(vertex)["heat_value"] = 0.0
-
+            self.heat_field.heal([vertex])
         else:
-            self.cell_properties.get(vertex)["is_ill"] = True
-            self.cell_properties.get(vertex)["illness_type"] = self._get_random_sickness()
-            self.cell_properties.get(vertex)["heat_value"] = 1.0
-
-        for v in self.get_neighbors(vertex):
-            self._update_neighbor_based_status_vertex(v)
-
-    def _update_neighbor_based_status_vertex(self, vertex: int):
-        """Updates the heat_values of the neighbors of an particular vertex based on if the current vertex is healed."""
-
-        if self.cell_properties.get(vertex)["is_ill"]:
-            self.cell_properties.get(vertex)["heat_value"] = 1.0
-        else:
-            if any(self.cell_properties.get(n).get("is_ill") for n in self.get_neighbors(vertex)):
-                # A neighboring cell is ill, so heat_value hanged to 0.5
-                self.cell_properties.get(vertex)["heat_value"] = 0.5
-            else:
-                self.cell_properties.get(vertex)["heat_value"] = 0.0
+            self.heat_field.set_ill([vertex], [self._get_random_sickness()])
+            self.vertex_state.infected_at[self.topology.index[vertex]] = self.schedule.steps
 
     def _set_random_vertex_to_ill(self):
         """Sets a random node to ill"""
-        options = set(self.network.nodes) - set(self.ill_vertices)
-        vertex = self.random.choice(list(options))
-        self.ill_vertices.append(vertex)
+        if self.legacy_infection_sampling:
+            options = set(self.topology.vertices) - set(self.ill_vertices)
+            vertex = self.random.choice(list(options))
+        else:
+            vertex = self.ill_vertices.sample_healthy(self.random)
+        self.ill_vertices.add(vertex)
 
         # update the cell properties of the current vertex
         self._update_illness_status(vertex, False)
@@ -149,11 +207,57 @@ class HumanModel(Model):
         # Agents' StagedActivation
         self.schedule.step()
 
-        self.total_energy_agents = sum(agent.energy for agent in self.schedule.agents if isinstance(agent, HelperAgent))
+        if self.helper_population is not None:
+            self.total_energy_agents = self.helper_population.total_energy()
+        else:
+            self.total_energy_agents = sum(agent.energy for agent in self.schedule.agents if isinstance(agent, HelperAgent))
 
         # Collect data
         self.datacollector.collect(self)
 
+    def _infection_possible(self) -> bool:
+        """Whether a vertex can still get ill in the coming steps."""
+        return len(self.ill_vertices) < self._max_ill_vertices and self._illness_chance > 0
+
+    def _healing_possible(self) -> bool:
+        """Whether an ill vertex can still be healed: there are helpers to find it or killers on their way to it."""
+        if self.alive_helper_agents > 0 or not all(factory.is_idle() for factory in self.agent_factories):
+            return True
+        return any(isinstance(agent, KillerAgent) for agent in self.schedule.agents)
+
+    def is_absorbed(self) -> bool:
+        """Whether the model is in an absorbing state, from which the outcome of the run is determined.
+        This is the case when no vertex can get ill anymore and either no vertex is ill, or no ill vertex can be healed.
+        From then on only the hitpoints change, by the same amount every step, see `fast_forward`.
+        """
+        if self._infection_possible():
+            return False
+        return not self.ill_vertices or not self._healing_possible()
+
+    def fast_forward(self, max_steps: int):
+        """Jumps from an absorbing state (see `is_absorbed`) to the end of the run, as if `step` was called
+        until the model stops running or max_steps steps have been made.
+        Only the hitpoints, the step count and `running` are updated; the agents stay where they are and
+        no data is collected for the skipped steps.
+        """
+        if not self.is_absorbed():
+            raise ValueError("fast_forward is only possible from an absorbing state")
+
+        remaining = max(max_steps - self.schedule.steps, 0)
+        damage = len(self.ill_vertices)  # Hitpoints lost per step
+        if damage:
+            # Steps that can be made before the hitpoints drop below 1
+            possible = max((self.hitpoints - 1) // damage, 0)
+            if possible < remaining:
+                self.hitpoints -= (possible + 1) * damage
+                self.running = False
+                remaining = possible
+            else:
+                self.hitpoints -= remaining * damage
+
+        self.schedule.steps += remaining
+        self.schedule.time += remaining
+
     def restore_vertex(self, healed_vertex: int):
         """Gets a sign from an agent that an ill vertex has been healed."""
         if healed_vertex in self.ill_vertices:
@@ -188,7 +292,7 @@ class HumanModel(Model):
         :return: HumanModel's ill_vertices
         :rtype: [int]
         """
-        return self.ill_vertices
+        return list(self.ill_vertices)
 
     def get_end(self):
         """Gets step count for batchrunner
@@ -198,13 +302,74 @@ class HumanModel(Model):
         """
         return self.schedule.steps
 
+    def get_dispatch_queue_length(self):
+        """Gets the amount of killer nanites waiting to be spawned
+
+        :return: Length of the factories' queues
+        :rtype: int
+        """
+        return self.dispatch.queue_length()
+
+    def get_mean_heal_latency(self):
+        """Gets the mean amount of steps from the report of an ill vertex to its heal, for batchrunner
+
+        :return: Mean report-to-heal time, NaN if no vertex has been healed
+        :rtype: float
+        """
+        return self.dispatch.mean_latency()
+
+    def get_agents_on_vertex(self, vertex: int) -> list:
+        """Gets all agents on the given vertex, including the agents of the helper population.
+
+        :return: Agents on the vertex
+        :rtype: list
+        """
+        agents = list(self.grid.get_cell(vertex))
+        if self.helper_population is not None:
+            agents += self.helper_population.members_at(vertex)
+        return agents
+
+    def get_helpers_with_alerts(self, vertex: int) -> list:
+        """Gets the helper agents on the given vertex that carry an alert for a disease.
+
+        :return: Helper agents with alerts on the vertex
+        :rtype: list
+        """
+        if self.helper_population is not None:
+            return self.helper_population.alerting_at(vertex)
+        return self.grid.get_alerting(vertex)
+
+    def get_available_helpers(self, vertex: int) -> list:
+        """Gets the helper agents on the given vertex that are not travelling to a factory.
+
+        :return: Helper agents without alerts on the vertex
+        :rtype: list
+        """
+        if self.helper_population is not None:
+            return [member for member in self.helper_population.members_at(vertex)
+                    if not member.alert_for_disease_on_node]
+        if not self.grid.get_alerting(vertex):
+            return self.grid.get_cell_of_class(vertex, HelperAgent)
+        return [a for a in self.grid.get_cell_of_class(vertex, HelperAgent) if not a.alert_for_disease_on_node]
+
+    def get_occupied_vertices(self) -> List[int]:
+        """Gets the vertices with at least one agent on them, including the agents of the helper population.
+
+        :return: Occupied vertices
+        :rtype: [int]
+        """
+        occupied = self.grid.occupied()
+        if self.helper_population is not None:
+            occupied = list(dict.fromkeys(occupied + self.helper_population.occupied()))
+        return occupied
+
     def get_neighbors(self, vertex) -> List[int]:
-        """Gets list of neighbor vertices of given vertex.
+        """Gets list of neighbor vertices of given vertex. The list is shared and should not be modified.
 
         :return: HumanModel's neighbors of vertex
         :rtype: [int]
         """
-        return list(self.network.neighbors(vertex))
+        return self.topology.neighbors(vertex)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}: hitpoints {self.hitpoints}; agents {self.num_agents}; ill vertices {self.ill_vertices}"
@@ -0,0 +1,26 @@
+from typing import Any
+
+from mesa import Agent
+
+
+class Perception(dict):
+    """The percepts of an agent in the current tick, computed on first access.
+
+    The `PERCEPTS` of the agent's class map the name of every percept to the function that computes it from the agent.
+    A percept is computed when it is read for the first time after `clear`, and stored for the rest of the tick. Agents clear their
+    perception in the perceive stage and read it in the act stage, before any agent has moved, so the percepts
+    describe the environment as it was perceived.
+    """
+    __slots__ = ("agent",)
+
+    def __init__(self, agent: Agent):
+        super().__init__()
+        self.agent = agent
+
+    def __missing__(self, name: str) -> Any:
+        try:
+            percept = type(self.agent).PERCEPTS[name]
+        except KeyError:
+            raise KeyError(name) from None
+        value = self[name] = percept(self.agent)
+        return value
@@ -0,0 +1,230 @@
+import json
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Mapping, Tuple
+
+import networkx as nx
+import numpy as np
+
+from loan.agentfactory import AgentFactory
+from loan.greedyhelperagent import GreedyHelperAgent
+from loan.helperagent import HelperAgent
+from loan.killeragent import KillerAgent
+from loan.topology import Topology
+
+MAGIC = b"LOANLOG1"
+INDEX_MAGIC = b"LOANIDX1"
+VERSION = 1
+
+# Kinds of agents in a log, a HelperPopulation's members are recorded as HelperAgents
+AGENT_KINDS = (HelperAgent, GreedyHelperAgent, KillerAgent, AgentFactory)
+_KIND_OF_CLASS = {cls: kind for kind, cls in enumerate(AGENT_KINDS)}
+
+# Events of a tick
+SPAWN = 0   # agent appears on vertex, value holds its kind
+MOVE = 1    # agent moves to vertex (or to the end of the agents on its own vertex)
+DEATH = 2   # agent disappears
+INFECT = 3  # vertex gets ill, value holds the illness
+HEAL = 4    # vertex is healed
+
+# Every tick is stored as a TICK_DTYPE header followed by n_events EVENT_DTYPE events
+TICK_DTYPE = np.dtype([("step", "<i8"), ("hitpoints", "<i8"), ("ill", "<i8"), ("alive", "<i8"), ("energy", "<i8"),
+                       ("healed", "<i8"), ("running", "u1"), ("n_events", "<u4")])
+EVENT_DTYPE = np.dtype([("code", "u1"), ("agent", "<i4"), ("vertex", "<i4"), ("value", "<i4")])
+
+
+class Recorder:
+    """Writes the run of a `HumanModel` to a compact binary event log, read back by `RunLog`.
+
+    Every call to `record` stores one tick: the model level values (hitpoints, ill vertices, helpers alive, energy)
+    and the events since the previous tick, found by comparing the model with the previous tick:
+     - agents that spawned, moved or died, agents get a dense id in the order in which they first appear
+     - vertices that got ill or were healed
+    Moves are stored in the order in which the agents end up on their vertex, so a replay puts the agents
+    on a vertex in the same order as the model does.
+
+    File layout: MAGIC, the length and JSON of the metadata (topology, agent kinds, parameters), the ticks,
+    and on `close` an index with the offset of every tick.
+    """
+
+    def __init__(self, model, path: Path, params: Mapping = None):
+        self.model = model
+        self.path = Path(path)
+        self._vertex_index = model.topology.index
+        self._ids: Dict[object, int] = {}
+        self._cells: List[List[object]] = [[] for _ in model.topology.vertices]
+        self._positions: Dict[object, int] = {}
+        self._kinds: Dict[object, int] = {}
+        self._is_ill = np.zeros(len(model.topology), dtype=bool)
+        self._offsets: List[int] = []
+
+        metadata = {"version": VERSION,
+                    "name": model.network.name,
+                    "vertices": model.topology.vertices,
+                    "edges": [[u, v, w] for u, v, w in model.network.edges(data="weight")],
+                    "kinds": [cls.__name__ for cls in AGENT_KINDS],
+                    "emoji": [cls.EMOJI for cls in AGENT_KINDS],
+                    "seed": model._seed,
+                    "params": dict(params or {})}
+        encoded = json.dumps(metadata).encode()
+        self._file = open(self.path, "wb")
+        self._file.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+        self.record()
+
+    def _snapshot(self) -> List[List[object]]:
+        """The agents per vertex index, in the order of `HumanModel.get_agents_on_vertex`, by key."""
+        model = self.model
+        cells = []
+        for vertex in model.topology.vertices:
+            cell = []
+            for agent in model.grid.get_cell(vertex):
+                self._kinds.setdefault(agent.unique_id, _KIND_OF_CLASS[type(agent)])
+                cell.append(agent.unique_id)
+            cells.append(cell)
+
+        population = model.helper_population
+        if population is not None:
+            for i in np.flatnonzero(population.alive):
+                cells[population.position[i]].append(("member", i))
+        return cells
+
+    def _agent_events(self, cells: List[List[object]]) -> List[Tuple[int, int, int, int]]:
+        positions = {key: i for i, cell in enumerate(cells) for key in cell}
+        events = [(DEATH, self._ids[key], -1, 0) for key in self._positions if key not in positions]
+
+        for i, (old, new) in enumerate(zip(self._cells, cells)):
+            if old == new:
+                continue
+            # The agents that stayed and kept their place come first, the others are (re)appended in order
+            stayed = [key for key in old if positions.get(key) == i]
+            kept = 0
+            while kept < min(len(stayed), len(new)) and stayed[kept] == new[kept]:
+                kept += 1
+            for key in new[kept:]:
+                if key in self._ids:
+                    events.append((MOVE, self._ids[key], i, 0))
+                else:
+                    self._ids[key] = len(self._ids)
+                    events.append((SPAWN, self._ids[key], i, self._kinds.get(key, _KIND_OF_CLASS[HelperAgent])))
+
+        self._cells = cells
+        self._positions = positions
+        return events
+
+    def _vertex_events(self) -> List[Tuple[int, int, int, int]]:
+        state = self.model.vertex_state
+        changed = np.flatnonzero(state.is_ill != self._is_ill)
+        events = [(INFECT, -1, i, int(state.illness[i])) if state.is_ill[i] else (HEAL, -1, i, 0) for i in changed]
+        self._is_ill = state.is_ill.copy()
+        return events
+
+    def record(self) -> None:
+        """Records the current state of the model as the next tick."""
+        model = self.model
+        events = np.array(self._agent_events(self._snapshot()) + self._vertex_events(), dtype=EVENT_DTYPE)
+        tick = np.array((model.schedule.steps, model.hitpoints, len(model.ill_vertices), model.alive_helper_agents,
+                         model.total_energy_agents, model.healed_count, model.running, len(events)), dtype=TICK_DTYPE)
+        self._offsets.append(self._file.tell())
+        self._file.write(tick.tobytes() + events.tobytes())
+
+    def close(self) -> None:
+        """Writes the index and closes the file."""
+        if self._file.closed:
+            return
+        offsets = np.array(self._offsets, dtype="<i8")
+        self._file.write(offsets.tobytes() + struct.pack("<Q", len(offsets)) + INDEX_MAGIC)
+        self._file.close()
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def record_run(path: Path, max_steps: int, seed: int = None, **params):
+    """Runs a `HumanModel` with the given parameters for at most max_steps steps and records it to path."""
+    from loan.model import HumanModel
+
+    model = HumanModel(**params, seed=seed)
+    with Recorder(model, path, params) as recorder:
+        while model.running and model.schedule.steps < max_steps:
+            model.step()
+            recorder.record()
+    return model
+
+
+class RunLog:
+    """A run written by a `Recorder`.
+
+    `ticks` holds the model level values of every tick, `events(tick)` the events of a single tick.
+    A log without index, for instance of a recording that crashed, is read up to its last complete tick.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._data = self.path.read_bytes()
+        if not self._data.startswith(MAGIC):
+            raise ValueError(f"{self.path} is not a run log")
+        (length,) = struct.unpack_from("<I", self._data, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.metadata = json.loads(self._data[start:start+length])
+        self._offsets = self._read_index(start + length)
+
+        ticks = [np.frombuffer(self._data, TICK_DTYPE, 1, offset) for offset in self._offsets]
+        self.ticks = np.concatenate(ticks) if ticks else np.zeros(0, dtype=TICK_DTYPE)
+        self.keyframes = {}  # Filled by the replays of this log, see `ReplayModel`
+
+        # The kind of every agent, by agent id
+        spawns = [events[events["code"] == SPAWN] for events in map(self.events, range(len(self)))]
+        spawns = np.concatenate(spawns) if spawns else np.zeros(0, dtype=EVENT_DTYPE)
+        self.agent_kinds = np.zeros(len(spawns), dtype=np.int8)
+        self.agent_kinds[spawns["agent"]] = spawns["value"]
+
+    def _read_index(self, start: int) -> List[int]:
+        data = self._data
+        if data.endswith(INDEX_MAGIC):
+            (count,) = struct.unpack_from("<Q", data, len(data) - len(INDEX_MAGIC) - 8)
+            index_start = len(data) - len(INDEX_MAGIC) - 8 - 8 * count
+            return np.frombuffer(data, "<i8", count, index_start).tolist()
+
+        offsets, offset = [], start
+        while offset + TICK_DTYPE.itemsize <= len(data):
+            n_events = int(np.frombuffer(data, TICK_DTYPE, 1, offset)["n_events"][0])
+            end = offset + TICK_DTYPE.itemsize + n_events * EVENT_DTYPE.itemsize
+            if end > len(data):
+                break
+            offsets.append(offset)
+            offset = end
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def events(self, tick: int) -> np.ndarray:
+        """The events of the given tick."""
+        offset = self._offsets[tick]
+        n_events = int(self.ticks["n_events"][tick])
+        return np.frombuffer(self._data, EVENT_DTYPE, n_events, offset + TICK_DTYPE.itemsize)
+
+    @property
+    def topology(self) -> Topology:
+        """The topology the run was recorded on."""
+        if not hasattr(self, "_topology"):
+            graph = nx.MultiDiGraph(name=self.metadata["name"])
+            graph.add_nodes_from(self.metadata["vertices"])
+            graph.add_weighted_edges_from(self.metadata["edges"])
+            self._topology = Topology(graph)
+        return self._topology
+
+
+@lru_cache(maxsize=8)
+def _load_run_log(fp: str, mtime: float) -> RunLog:
+    return RunLog(Path(fp))
+
+
+def load_run_log(fp: Path) -> RunLog:
+    """Loads the run log in the given file, a file is only read again when it changed."""
+    path = Path(fp).resolve()
+    return _load_run_log(str(path), path.stat().st_mtime)
@@ -0,0 +1,150 @@
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+
+from loan.collector import ColumnView
+from loan.heatfield import HeatField
+from loan.recorder import DEATH, HEAL, INFECT, MOVE, SPAWN, RunLog, load_run_log
+from loan.vertexstate import VertexState
+
+
+class RecordedAgent:
+    """An agent of a recorded run, as far as the visualization needs it."""
+    __slots__ = ("unique_id", "kind", "_emoji")
+
+    def __init__(self, unique_id: int, kind: int, emoji: str):
+        self.unique_id = unique_id
+        self.kind = kind
+        self._emoji = emoji
+
+    def emojify(self):
+        return self._emoji
+
+
+class ReplayCollector:
+    """The collected data of a replay up to its current tick, in the form of `ModelCollector.model_vars`."""
+
+    def __init__(self, replay: "ReplayModel"):
+        self.replay = replay
+
+    @property
+    def model_vars(self) -> Dict[str, ColumnView]:
+        ticks = self.replay.log.ticks[:self.replay.tick + 1]
+        return {"Hitpoints": ColumnView(ticks["hitpoints"]),
+                "Ill vertex count": ColumnView(ticks["ill"]),
+                "Helper Agents alive": ColumnView(ticks["alive"]),
+                "Helper Agents energy": ColumnView(ticks["energy"])}
+
+
+class ReplayModel:
+    """Plays back a run recorded by a `Recorder`, without running the model.
+    Offers what the visualization reads of a `HumanModel`, so it can be served by the same `ModularServer`.
+
+    Every `step` moves `speed` ticks forward, `seek` jumps to any tick. The state at every KEYFRAME_INTERVAL-th
+    tick is kept with the log, so going back only replays the ticks since the closest keyframe.
+    """
+    KEYFRAME_INTERVAL = 50
+
+    def __init__(self, log: Union[RunLog, Path, str], speed: int = 1, start_tick: int = 0):
+        self.log = log if isinstance(log, RunLog) else load_run_log(log)
+        if not len(self.log):
+            raise ValueError(f"{self.log.path} holds no ticks")
+        self.topology = self.log.topology
+        self.network = self.topology.graph
+        self.speed = max(int(speed), 1)
+        self._emoji = self.log.metadata["emoji"]
+        self._agents: Dict[int, RecordedAgent] = {}
+        self.datacollector = ReplayCollector(self)
+        self._restore(None)
+        self.seek(start_tick)
+
+    def _restore(self, keyframe) -> None:
+        """Resets the state to the given keyframe, or to before the first tick."""
+        self.vertex_state = VertexState(self.topology.vertices, self.topology.index)
+        self.cell_properties = self.vertex_state.view()
+        self.heat_field = HeatField(self.vertex_state, self.topology)
+        if keyframe is None:
+            self.tick = -1
+            self._cells: List[List[int]] = [[] for _ in self.topology.vertices]
+            self._positions: Dict[int, int] = {}
+            return
+
+        self.tick, cells, positions, is_ill, illness = keyframe
+        self._cells = [list(cell) for cell in cells]
+        self._positions = dict(positions)
+        ill = np.flatnonzero(is_ill)
+        self.heat_field.set_ill([self.topology.vertices[i] for i in ill], illness[ill])
+
+    def _keyframe(self) -> tuple:
+        state = self.vertex_state
+        return (self.tick, [list(cell) for cell in self._cells], dict(self._positions),
+                state.is_ill.copy(), state.illness.copy())
+
+    def _apply(self, tick: int) -> None:
+        """Applies the events of the next tick."""
+        events = self.log.events(tick)
+        cells, positions, vertices = self._cells, self._positions, self.topology.vertices
+
+        # Agents leave their vertex before any agent arrives, see `Recorder`
+        for code, agent, vertex, value in events.tolist():
+            if code == DEATH or code == MOVE:
+                cells[positions[agent]].remove(agent)
+                if code == DEATH:
+                    del positions[agent]
+        for code, agent, vertex, value in events.tolist():
+            if code == SPAWN or code == MOVE:
+                cells[vertex].append(agent)
+                positions[agent] = vertex
+
+        infected = events[events["code"] == INFECT]
+        if len(infected):
+            self.heat_field.set_ill([vertices[i] for i in infected["vertex"]], infected["value"])
+        healed = events[events["code"] == HEAL]
+        if len(healed):
+            self.heat_field.heal([vertices[i] for i in healed["vertex"]])
+
+        self.tick = tick
+        if tick % self.KEYFRAME_INTERVAL == 0:
+            self.log.keyframes.setdefault(tick, self._keyframe())
+
+    def seek(self, tick: int) -> None:
+        """Jumps to the given tick, clipped to the ticks of the log."""
+        tick = min(max(int(tick), 0), len(self.log) - 1)
+        keyframe = max((t for t in self.log.keyframes if t <= tick), default=None)
+        if tick < self.tick or (keyframe is not None and keyframe > self.tick):
+            self._restore(None if keyframe is None else self.log.keyframes[keyframe])
+        for t in range(self.tick + 1, tick + 1):
+            self._apply(t)
+
+        header = self.log.ticks[self.tick]
+        self.steps = int(header["step"])
+        self.hitpoints = int(header["hitpoints"])
+        self.alive_helper_agents = int(header["alive"])
+        self.total_energy_agents = int(header["energy"])
+        self.healed_count = int(header["healed"])
+        self.running = self.tick < len(self.log) - 1
+
+    def step(self) -> None:
+        self.seek(self.tick + self.speed)
+
+    @property
+    def ill_vertices(self) -> List[int]:
+        return [self.topology.vertices[i] for i in np.flatnonzero(self.vertex_state.is_ill)]
+
+    def get_occupied_vertices(self) -> List[int]:
+        """The vertices with at least one recorded agent on them."""
+        return [vertex for vertex, cell in zip(self.topology.vertices, self._cells) if cell]
+
+    def get_agents_on_vertex(self, vertex: int) -> List[RecordedAgent]:
+        """The recorded agents on the given vertex, in the order of `HumanModel.get_agents_on_vertex`."""
+        agents = []
+        for agent_id in self._cells[self.topology.index[vertex]]:
+            if agent_id not in self._agents:
+                kind = int(self.log.agent_kinds[agent_id])
+                self._agents[agent_id] = RecordedAgent(agent_id, kind, self._emoji[kind])
+            agents.append(self._agents[agent_id])
+        return agents
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} {self.log.path}: tick {self.tick}/{len(self.log) - 1}"
@@ -0,0 +1,110 @@
+import csv
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+RunKey = Tuple[str, ...]
+
+
+class CsvResultSink:
+    """Append-only CSV file with the results of a batch run, written run by run.
+
+    Each row holds the parameters, the iteration and the model reporters of one finished run.
+    Optionally, the per-step data of every run is written to a second file, `<name>.steps.csv`.
+    Rows are flushed as soon as they are written, so the results of finished runs survive a crash.
+    When the file already exists, it is appended to and `completed` tells which runs can be skipped.
+    """
+
+    def __init__(self, path: Path, param_names: Sequence[str], reporter_names: Sequence[str],
+                 step_names: Sequence[str] = None):
+        self.path = Path(path)
+        self.param_names = list(param_names)
+        self.header = self.param_names + ["Iteration"] + list(reporter_names)
+        self._completed = self._open(self.path, self.header)
+        self._file = open(self.path, "a", newline="")
+        self._writer = csv.writer(self._file)
+
+        self._step_file = None
+        if step_names is not None:
+            self.step_path = self.path.with_name(f"{self.path.stem}.steps.csv")
+            self.step_header = self.param_names + ["Iteration", "Step"] + list(step_names)
+            self._open(self.step_path, self.step_header)
+            self._drop_unfinished_steps()
+            self._step_file = open(self.step_path, "a", newline="")
+            self._step_writer = csv.writer(self._step_file)
+
+    @staticmethod
+    def _open(path: Path, header: List[str]) -> Set[RunKey]:
+        """Prepares the file for appending and returns the keys of the runs already in it.
+        A partly written last row, left behind by a crash, is removed."""
+        if not path.exists() or path.stat().st_size == 0:
+            with open(path, "w", newline="") as f:
+                csv.writer(f).writerow(header)
+            return set()
+
+        with open(path, "rb+") as f:
+            data = f.read()
+            if not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            existing_header = next(reader, None)
+            if existing_header != header:
+                raise ValueError(f"{path} has columns {existing_header}, expected {header}")
+            n_keys = header.index("Iteration") + 1
+            return {tuple(row[:n_keys]) for row in reader if len(row) == len(header)}
+
+    def _drop_unfinished_steps(self) -> None:
+        """Removes the step data of runs that didn't finish, which are run again."""
+        n_keys = len(self.param_names) + 1
+        with open(self.step_path, newline="") as f:
+            reader = csv.reader(f)
+            next(reader)
+            if all(tuple(row[:n_keys]) in self._completed for row in reader):
+                return
+
+        tmp_path = self.step_path.with_suffix(".tmp")
+        with open(self.step_path, newline="") as f, open(tmp_path, "w", newline="") as out:
+            reader, writer = csv.reader(f), csv.writer(out)
+            writer.writerow(next(reader))
+            writer.writerows(row for row in reader if tuple(row[:n_keys]) in self._completed)
+        os.replace(tmp_path, self.step_path)
+
+    def run_key(self, params: Dict, iteration: int) -> RunKey:
+        return tuple(str(params[name]) for name in self.param_names) + (str(iteration),)
+
+    def completed(self) -> Set[RunKey]:
+        """Keys of the runs that were already written, see `run_key`."""
+        return set(self._completed)
+
+    def write_run(self, params: Dict, iteration: int, reporters: Dict,
+                  steps: Iterable[Tuple[int, Sequence]] = None) -> None:
+        """Writes the results of one run. `steps` holds the step number and the row of step data of every collected
+        step, e.g. from `ModelCollector.steps` and `ModelCollector.rows`."""
+        key = self.run_key(params, iteration)
+        if self._step_file is not None and steps is not None:
+            self._step_writer.writerows(key + (step,) + tuple(row) for step, row in steps)
+            self._step_file.flush()
+
+        # The run row goes last, so a run only counts as completed once its step data is written
+        self._writer.writerow(key + tuple(reporters[name] for name in self.header[len(key):]))
+        self._file.flush()
+        self._completed.add(key)
+
+    def close(self) -> None:
+        self._file.close()
+        if self._step_file is not None:
+            self._step_file.close()
+
+    def __enter__(self) -> "CsvResultSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def read_dataframe(self, steps: bool = False):
+        """Reads the written results into a pandas DataFrame."""
+        import pandas as pd
+        return pd.read_csv(self.step_path if steps else self.path)
+
@@ -0,0 +1,146 @@
+from collections import namedtuple
+from typing import Dict, List, Sequence, Tuple
+
+import networkx as nx
+
+Route = namedtuple("Route", ["path", "step_cost", "energy_costs"])
+
+# Graphs with at most this many vertices get all their routes computed up front
+PRECOMPUTE_LIMIT = 200
+
+
+class RoutingTable:
+    """Routing index over a network, queried by the agents instead of calling networkx every tick.
+
+    Holds per (source, target) pair:
+     - All weighted shortest paths (as found by `nx.all_shortest_paths`)
+     - The best of those paths, its step cost and per-edge energy costs
+     - The next hop on that best path
+
+    And per set of targets (e.g. the factories) the nearest target of every vertex,
+    and per (source, radius) the vertices within that many hops of the source,
+    with the shortest paths that stay within them.
+
+    Pairs are computed on first use and cached, or all at once with `precompute`.
+    The table is only valid for the graph it was built from; call `clear` after changing the graph.
+    """
+
+    def __init__(self, graph: nx.MultiDiGraph, precompute: bool = False):
+        self.graph = graph
+        self._paths: Dict[Tuple[int, int], List[List[int]]] = {}
+        self._routes: Dict[Tuple[int, int], Route] = {}
+        self._edge_costs: Dict[Tuple[int, int], int] = {}
+        self._nearest: Dict[Tuple[int, ...], Dict[int, int]] = {}
+        self._within: Dict[Tuple[int, int], Dict[int, int]] = {}
+        self._paths_within: Dict[Tuple[int, int, int], List[List[int]]] = {}
+
+        if precompute:
+            self.precompute()
+
+    def precompute(self) -> None:
+        """Computes the routes between all pairs of vertices."""
+        for source in self.graph.nodes:
+            for target in self.graph.nodes:
+                self.best_path(source, target)
+
+    def clear(self) -> None:
+        """Drops all cached routes, e.g. after the graph has been changed."""
+        self._paths.clear()
+        self._routes.clear()
+        self._edge_costs.clear()
+        self._nearest.clear()
+        self._within.clear()
+        self._paths_within.clear()
+
+    def edge_cost(self, source: int, target: int) -> int:
+        """Energy cost of moving over the first edge from source to target."""
+        try:
+            return self._edge_costs[source, target]
+        except KeyError:
+            cost = self._edge_costs[source, target] = self.graph[source][target][0]["weight"]
+            return cost
+
+    def path_cost(self, path: List[int]) -> List[int]:
+        """Energy cost per edge of the given path."""
+        return [self.edge_cost(path[i], path[i+1]) for i in range(len(path)-1)]
+
+    def paths(self, source: int, target: int) -> List[List[int]]:
+        """All shortest paths from source to target, the shortest path being the one with the least total weight.
+
+        The returned list is shared between callers and should not be modified.
+        """
+        try:
+            return self._paths[source, target]
+        except KeyError:
+            paths = self._paths[source, target] = list(
+                nx.all_shortest_paths(self.graph, source=source, target=target, weight="weight"))
+            return paths
+
+    def best_path(self, source: int, target: int) -> Route:
+        """The best of the shortest paths from source to target.
+        The best path is the one with the lowest amount of steps plus energy cost.
+        """
+        try:
+            return self._routes[source, target]
+        except KeyError:
+            path = min(self.paths(source, target), key=lambda x: len(x) + sum(self.path_cost(x)))
+            route = self._routes[source, target] = Route(path, len(path), self.path_cost(path))
+            return route
+
+    def next_hop(self, source: int, target: int) -> Tuple[int, int]:
+        """The next vertex on the best path from source to target and the energy cost to get there."""
+        path, _, energy_costs = self.best_path(source, target)
+        if len(path) < 2:
+            return source, 0
+        return path[1], energy_costs[0]
+
+    def nearest(self, targets: Sequence[int]) -> Dict[int, int]:
+        """The nearest of the targets from every vertex, by total weight of the shortest path to it.
+        Ties go to the target listed first.
+
+        The returned dictionary is shared between callers and should not be modified.
+        """
+        targets = tuple(targets)
+        try:
+            return self._nearest[targets]
+        except KeyError:
+            # Distances to a target are distances from it in the reversed graph
+            reverse = self.graph.reverse(copy=False)
+            best: Dict[int, Tuple[int, int]] = {}
+            for target in targets:
+                for vertex, cost in nx.single_source_dijkstra_path_length(reverse, target, weight="weight").items():
+                    if vertex not in best or cost < best[vertex][0]:
+                        best[vertex] = cost, target
+            nearest = self._nearest[targets] = {vertex: best[vertex][1] if vertex in best else targets[0]
+                                                for vertex in self.graph.nodes}
+            return nearest
+
+    def within(self, source: int, radius: int) -> Dict[int, int]:
+        """The vertices reachable from source in at most radius hops, with their amount of hops, nearest first.
+        Found by a breadth-first search that stops at the radius, so it doesn't visit the rest of the graph.
+
+        The returned dictionary is shared between callers and should not be modified.
+        """
+        try:
+            return self._within[source, radius]
+        except KeyError:
+            ball = self._within[source, radius] = nx.single_source_shortest_path_length(self.graph, source, cutoff=radius)
+            return ball
+
+    def paths_within(self, source: int, target: int, radius: int) -> List[List[int]]:
+        """All shortest paths from source to target that only visit vertices within radius hops of source,
+        empty if target is further away. Searches the subgraph of those vertices, not the rest of the graph.
+
+        The returned list is shared between callers and should not be modified.
+        """
+        try:
+            return self._paths_within[source, target, radius]
+        except KeyError:
+            ball = self.within(source, radius)
+            if target in ball:
+                paths = list(nx.all_shortest_paths(self.graph.subgraph(ball), source=source, target=target,
+                                                   weight="weight"))
+            else:
+                paths = []
+            self._paths_within[source, target, radius] = paths
+            return paths
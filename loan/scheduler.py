@@ -0,0 +1,67 @@
+from typing import Dict, List, Set
+
+from mesa import Agent, Model
+from mesa.time import StagedActivation
+
+
+class ActivityScheduler(StagedActivation):
+    """StagedActivation that only calls the agents that have something to do in a stage.
+
+    - Agents declare the stages they take part in with a `stages` attribute, agents without it take part in all stages
+    - Agents with a `can_sleep` method are asked after every step whether they are idle, idle agents are skipped in
+      all stages until they are woken with `wake`, e.g. by an event of the grid
+    - Agents are called in the order in which they were added, like by StagedActivation, so a model runs the same
+      as with StagedActivation as long as the skipped calls would have done nothing
+
+    The agents of every stage are taken at the start of a step: agents added during a step are called from the next
+    step on, and agents woken during a step as well.
+    """
+
+    def __init__(self, model: Model, stage_list: List[str]) -> None:
+        super().__init__(model, stage_list)
+        self._stage_agents: Dict[str, Dict[int, Agent]] = {stage: {} for stage in self.stage_list}
+        self._sleepers: Dict[int, Agent] = {}  # Agents that can sleep
+        self._sleeping: Set[int] = set()
+
+    def add(self, agent: Agent) -> None:
+        super().add(agent)
+        for stage in getattr(agent, "stages", self.stage_list):
+            self._stage_agents[stage][agent.unique_id] = agent
+        if hasattr(agent, "can_sleep"):
+            self._sleepers[agent.unique_id] = agent
+
+    def remove(self, agent: Agent) -> None:
+        super().remove(agent)
+        for agents in self._stage_agents.values():
+            agents.pop(agent.unique_id, None)
+        self._sleepers.pop(agent.unique_id, None)
+        self._sleeping.discard(agent.unique_id)
+
+    def wake(self, agent: Agent) -> None:
+        """Wakes the agent, it takes part in the stages again from the next step on."""
+        self._sleeping.discard(agent.unique_id)
+
+    def is_asleep(self, agent: Agent) -> bool:
+        return agent.unique_id in self._sleeping
+
+    def _run_stage(self, stage: str, agents: List[Agent]) -> None:
+        """Calls the given agents for the stage."""
+        for agent in agents:
+            getattr(agent, stage)()
+
+    def step(self) -> None:
+        """Executes the stages for the agents that take part in them and are awake, then puts idle agents to sleep."""
+        sleeping = self._sleeping
+        if sleeping:
+            stages = [[agent for key, agent in self._stage_agents[stage].items() if key not in sleeping]
+                      for stage in self.stage_list]
+        else:
+            stages = [list(self._stage_agents[stage].values()) for stage in self.stage_list]
+        for stage, agents in zip(self.stage_list, stages):
+            self._run_stage(stage, agents)
+            self.time += self.stage_time
+        self.steps += 1
+
+        for key, agent in self._sleepers.items():
+            if key not in sleeping and agent.can_sleep():
+                sleeping.add(key)
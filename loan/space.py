@@ -0,0 +1,132 @@
+from itertools import count
+from typing import Any, Callable, Dict, List, Set
+
+from mesa import Agent
+from mesa.space import NetworkGrid
+
+
+class OccupancyGrid(NetworkGrid):
+    """NetworkGrid that keeps the agents per vertex in its own dictionary instead of in the node attributes of the graph.
+    This leaves the graph untouched, so it can be shared between models.
+
+    Next to the agents per vertex, the grid keeps an index of them per agent class and of the helpers on every vertex
+    that carry an alert, updated as agents are placed, moved and removed. Agents get a number on every arrival, the
+    agents of a vertex are in order of arrival like the lists of a NetworkGrid.
+    """
+
+    def __init__(self, G: Any) -> None:
+        self.G = G
+        self._cells: Dict[int, Dict[Agent, int]] = {node_id: {} for node_id in G.nodes}  # Agent -> arrival
+        self._classes: Dict[int, Dict[type, Dict[Agent, int]]] = {node_id: {} for node_id in G.nodes}
+        self._alerts: Dict[int, Dict[Agent, int]] = {node_id: {} for node_id in G.nodes}
+        self._arrivals = count()
+        self._alert_watchers: Dict[int, List[Callable[[], None]]] = {}
+
+    def _place_agent(self, agent: Agent, node_id: int) -> None:
+        """Place the agent at the correct node."""
+        arrival = self._cells[node_id][agent] = next(self._arrivals)
+        self._classes[node_id].setdefault(type(agent), {})[agent] = arrival
+        if getattr(agent, "alert_for_disease_on_node", False):
+            self._alerts[node_id][agent] = arrival
+            self.alert_raised(node_id)
+
+    def _remove_agent(self, agent: Agent, node_id: int) -> None:
+        """Remove an agent from a node."""
+        del self._cells[node_id][agent]
+        classes = self._classes[node_id]
+        members = classes[type(agent)]
+        del members[agent]
+        if not members:
+            del classes[type(agent)]
+        self._alerts[node_id].pop(agent, None)
+
+    def set_alert(self, agent: Agent, alert: bool) -> None:
+        """Updates the alert index after the alert of the agent was raised or reset."""
+        arrival = self._cells[agent.pos].get(agent) if agent.pos in self._cells else None
+        if arrival is None:  # Not (or no longer) on the grid
+            return
+        if alert:
+            self._alerts[agent.pos][agent] = arrival
+            self.alert_raised(agent.pos)
+        else:
+            self._alerts[agent.pos].pop(agent, None)
+
+    def watch_alerts(self, node_id: int, callback: Callable[[], None]) -> None:
+        """Calls callback whenever an agent with an alert arrives on the node, or raises an alert on it."""
+        self._alert_watchers.setdefault(node_id, []).append(callback)
+
+    def alert_raised(self, node_id: int) -> None:
+        """Lets the watchers of the node know that an agent on it carries an alert."""
+        for callback in self._alert_watchers.get(node_id, ()):
+            callback()
+
+    def is_cell_empty(self, node_id: int) -> bool:
+        """Returns a bool of the contents of a cell."""
+        return not self._cells[node_id]
+
+    def get_cell(self, node_id: int) -> List[Agent]:
+        """Returns the agents on the given node."""
+        return list(self._cells[node_id])
+
+    def get_cell_of_class(self, node_id: int, cls: type) -> List[Agent]:
+        """Returns the agents on the given node that are instances of cls, in order of arrival."""
+        groups = [members for kind, members in self._classes[node_id].items() if issubclass(kind, cls)]
+        if len(groups) == 1:
+            return list(groups[0])
+        return sorted((agent for members in groups for agent in members), key=self._cells[node_id].get)
+
+    def count(self, node_id: int, cls: type = Agent) -> int:
+        """Amount of agents on the given node that are instances of cls."""
+        return sum(len(members) for kind, members in self._classes[node_id].items() if issubclass(kind, cls))
+
+    def get_alerting(self, node_id: int) -> List[Agent]:
+        """Returns the agents on the given node that carry an alert, in order of arrival."""
+        alerts = self._alerts[node_id]
+        return sorted(alerts, key=alerts.get)
+
+    def occupied(self) -> List[int]:
+        """The nodes with at least one agent on them."""
+        return [node_id for node_id, cell in self._cells.items() if cell]
+
+    def get_cell_list_contents(self, cell_list: List[int]) -> List[Agent]:
+        return [agent for node_id in cell_list for agent in self._cells[node_id]]
+
+    def get_all_cell_contents(self) -> List[Agent]:
+        return self.get_cell_list_contents(self._cells)
+
+    def iter_cell_list_contents(self, cell_list: List[int]):
+        return iter(self.get_cell_list_contents(cell_list))
+
+
+class ReservationTable:
+    """Reservations of the outgoing edges of every vertex, shared by the helpers on that vertex to spread out.
+
+    A helper that picks a neighbor reserves it, so the next helpers on the same vertex pick one of the others;
+    once all neighbors are taken the reservations of the vertex are released and the cycle starts over.
+    Reservations only hold during a single tick, they are dropped on the first use of a vertex in a new tick.
+    """
+
+    def __init__(self, model) -> None:
+        self.model = model
+        self._reserved: Dict[int, Set[int]] = {}
+        self._tick: Dict[int, int] = {}  # Tick in which the reservations of a vertex were made
+
+    def reserved(self, vertex: int) -> Set[int]:
+        """The neighbors of the vertex reserved in this tick."""
+        tick = self.model.schedule.steps
+        if self._tick.get(vertex) != tick:
+            self._tick[vertex] = tick
+            self._reserved[vertex] = set()
+        return self._reserved[vertex]
+
+    def available(self, vertex: int, neighbors: List[int]) -> Set[int]:
+        """The neighbors of the vertex that haven't been reserved in this tick."""
+        return set(neighbors) - self.reserved(vertex)
+
+    def reserve(self, vertex: int, neighbor: int) -> None:
+        """Reserves the edge from vertex to neighbor for the rest of this tick."""
+        self.reserved(vertex).add(neighbor)
+
+    def release(self, vertex: int) -> None:
+        """Releases all reservations of the vertex."""
+        self.reserved(vertex).clear()
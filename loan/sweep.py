@@ -0,0 +1,230 @@
+import hashlib
+import math
+import os
+import statistics
+import sys
+import time
+from collections import namedtuple
+from itertools import product
+from multiprocessing import Pool
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Sequence
+
+from loan.model import HumanModel
+
+RunSpec = namedtuple("RunSpec", ["params", "iteration", "seed"])
+RunResult = namedtuple("RunResult", ["params", "iteration", "seed", "reporters", "steps", "n_steps"])
+
+MODEL_REPORTERS = {"Hitpoints": HumanModel.get_hitpoints,
+                   "Ill vertices": HumanModel.get_ill_vertices,
+                   "End time": HumanModel.get_end,
+                   "Vertices healed": HumanModel.get_healed_count,
+                   "Mean heal latency": HumanModel.get_mean_heal_latency}
+
+
+def available_cores() -> int:
+    """Amount of cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def run_seed(base_seed: int, params: Mapping, iteration: int) -> int:
+    """Deterministic seed of a single run, derived from the base seed, the parameters and the iteration."""
+    key = repr((base_seed, sorted(params.items()), iteration)).encode()
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big")
+
+
+def run_model(params: Mapping, seed: int, max_steps: int, early_stop: bool = False,
+              collect_data: bool = True) -> HumanModel:
+    """Runs a single model with the given parameters and seed for at most max_steps steps.
+    With early_stop, the run jumps to its end as soon as the model reaches an absorbing state,
+    which gives the same hitpoints, healed vertices and end time but skips the data collection of the remaining steps.
+    """
+    model = HumanModel(**{"collect_data": collect_data, **params}, seed=seed)
+    while model.running and model.schedule.steps < max_steps:
+        if early_stop and model.is_absorbed():
+            model.fast_forward(max_steps)
+            break
+        model.step()
+    return model
+
+
+def replay_run(params: Mapping, seed: int, max_steps: int) -> HumanModel:
+    """Runs a single run of a sweep again, given the parameters and seed stored with its results."""
+    return run_model(params, seed, max_steps)
+
+
+class AdaptiveStopping:
+    """Stops running iterations of a parameter combination once the means of the metrics are known precisely enough.
+
+    After at least `min_iterations` runs, a combination is done when for every metric the half-width of the
+    normal confidence interval (z * stdev / sqrt(n)) is at most `abs_tolerance` or `rel_tolerance` times the mean.
+    New iterations are started `batch_iterations` at a time per combination.
+    """
+
+    def __init__(self, metrics: Sequence[str] = ("Vertices healed", "Hitpoints"), rel_tolerance: float = 0.05,
+                 abs_tolerance: float = 0.5, z: float = 1.96, min_iterations: int = 10, batch_iterations: int = 10):
+        self.metrics = list(metrics)
+        self.rel_tolerance = rel_tolerance
+        self.abs_tolerance = abs_tolerance
+        self.z = z
+        self.min_iterations = max(min_iterations, 2)
+        self.batch_iterations = batch_iterations
+
+    def half_width(self, values: Sequence[float]) -> float:
+        """Half-width of the confidence interval of the mean of the values."""
+        return self.z * statistics.stdev(values) / math.sqrt(len(values))
+
+    def is_converged(self, results: Sequence[Mapping]) -> bool:
+        """Whether the given reporters of the runs of one combination are precise enough."""
+        if len(results) < self.min_iterations:
+            return False
+        for metric in self.metrics:
+            values = [result[metric] for result in results]
+            tolerance = max(self.abs_tolerance, self.rel_tolerance * abs(statistics.mean(values)))
+            if self.half_width(values) > tolerance:
+                return False
+        return True
+
+
+def _run_chunk(chunk) -> List[RunResult]:
+    """Runs a chunk of runs in a worker process."""
+    specs, max_steps, reporters, collect_steps, early_stop = chunk
+    results = []
+    for params, iteration, seed in specs:
+        model = run_model(params, seed, max_steps, early_stop and not collect_steps, collect_steps)
+        collector = model.datacollector
+        steps = list(zip(collector.steps.tolist(), collector.rows())) if collect_steps else None
+        results.append(RunResult(params, iteration, seed, {name: reporter(model) for name, reporter in reporters.items()},
+                                 steps, model.schedule.steps))
+    return results
+
+
+class SweepExecutor:
+    """Runs `HumanModel` for all combinations of the variable parameters on a pool of worker processes.
+
+    - Every run gets its own seed from `run_seed`, so any single run can be replayed with `replay_run`
+    - Runs are handed to the workers in chunks, to spread the cost of pickling and communication over many runs
+    - While running, the throughput (runs/s and steps/s) is reported every `report_interval` seconds
+    - With `early_stop`, runs end as soon as their outcome is determined (see `HumanModel.is_absorbed`)
+    - With `adaptive`, every parameter combination runs up to `iterations` times, but stops as soon as
+      the `AdaptiveStopping` criterion is met
+    """
+
+    def __init__(self, variable_params: Mapping[str, Sequence], fixed_params: Mapping = None, iterations: int = 100,
+                 max_steps: int = 100, processes: int = None, chunk_size: int = None, base_seed: int = 0,
+                 model_reporters: Dict[str, Callable] = None, collect_steps: bool = False,
+                 report_interval: float = 5.0, early_stop: bool = True, adaptive: AdaptiveStopping = None):
+        self.variable_params = dict(variable_params)
+        self.fixed_params = dict(fixed_params or {})
+        self.iterations = iterations
+        self.max_steps = max_steps
+        self.processes = processes if processes is not None else available_cores()
+        self.chunk_size = chunk_size
+        self.base_seed = base_seed
+        self.model_reporters = model_reporters if model_reporters is not None else MODEL_REPORTERS
+        self.collect_steps = collect_steps
+        self.report_interval = report_interval
+        self.early_stop = early_stop
+        self.adaptive = adaptive
+        self.runs_done = 0
+        self.steps_done = 0
+        self.elapsed = 0.0
+
+    def param_combinations(self) -> Iterator[Dict]:
+        """All combinations of the variable parameters, each combination only once: a repeated value would give
+        runs with the same seeds and the same keys in the results, not more samples. Use `iterations` for those."""
+        names = list(self.variable_params)
+        seen = set()
+        for values in product(*self.variable_params.values()):
+            if values not in seen:
+                seen.add(values)
+                yield dict(zip(names, values))
+
+    def runs(self, iterations: Iterable[int] = None, skip: Callable[[Dict, int], bool] = None) -> List[RunSpec]:
+        """All runs of the sweep, minus the ones for which skip(variable_params, iteration) holds."""
+        iterations = range(self.iterations) if iterations is None else iterations
+        specs = []
+        for variables in self.param_combinations():
+            params = {**self.fixed_params, **variables}
+            for iteration in iterations:
+                if skip is None or not skip(variables, iteration):
+                    specs.append(RunSpec(params, iteration, run_seed(self.base_seed, params, iteration)))
+        return specs
+
+    def _chunks(self, specs: List[RunSpec]) -> List[tuple]:
+        chunk_size = self.chunk_size or max(1, min(50, len(specs) // (self.processes * 4)))
+        return [(specs[i:i+chunk_size], self.max_steps, self.model_reporters, self.collect_steps, self.early_stop)
+                for i in range(0, len(specs), chunk_size)]
+
+    def execute(self, specs: List[RunSpec]) -> Iterator[RunResult]:
+        """Runs the given runs, yields the results as the chunks finish (in no particular order)."""
+        chunks = self._chunks(specs)
+        start = last_report = time.perf_counter()
+        runs_done = steps_done = 0
+
+        if self.processes == 1:
+            results = map(_run_chunk, chunks)
+            pool = None
+        else:
+            pool = Pool(self.processes)
+            results = pool.imap_unordered(_run_chunk, chunks)
+
+        try:
+            for chunk_results in results:
+                for result in chunk_results:
+                    runs_done += 1
+                    steps_done += result.n_steps
+                    yield result
+
+                now = time.perf_counter()
+                if now - last_report >= self.report_interval:
+                    print(f"{runs_done}/{len(specs)} runs; {runs_done / (now - start):.1f} runs/s; "
+                          f"{steps_done / (now - start):.0f} steps/s", file=sys.stderr, flush=True)
+                    last_report = now
+        finally:
+            if pool is not None:
+                pool.terminate()
+            self.elapsed += time.perf_counter() - start
+            self.runs_done += runs_done
+            self.steps_done += steps_done
+
+    def run(self, skip: Callable[[Dict, int], bool] = None) -> Iterator[RunResult]:
+        """Runs the whole sweep, see `execute`."""
+        if self.adaptive is not None:
+            return self._run_adaptive(skip)
+        return self.execute(self.runs(skip=skip))
+
+    def _run_adaptive(self, skip: Callable[[Dict, int], bool] = None) -> Iterator[RunResult]:
+        """Runs the sweep in rounds of `adaptive.batch_iterations` iterations per parameter combination,
+        until every combination has converged or has run `iterations` times.
+        Skipped runs are not run again, and don't count towards the convergence of their combination.
+        """
+        combinations = [({**self.fixed_params, **variables}, variables) for variables in self.param_combinations()]
+        reporters = [[] for _ in combinations]
+        active = list(range(len(combinations)))
+        done = 0
+
+        while active and done < self.iterations:
+            iterations = range(done, min(done + self.adaptive.batch_iterations, self.iterations))
+            done = iterations.stop
+            specs, cell_of_run = [], {}
+            for cell in active:
+                params, variables = combinations[cell]
+                for iteration in iterations:
+                    if skip is None or not skip(variables, iteration):
+                        spec = RunSpec(params, iteration, run_seed(self.base_seed, params, iteration))
+                        specs.append(spec)
+                        cell_of_run[spec.seed, iteration] = cell
+
+            for result in self.execute(specs):
+                reporters[cell_of_run[result.seed, result.iteration]].append(result.reporters)
+                yield result
+
+            active = [cell for cell in active if not self.adaptive.is_converged(reporters[cell])]
+
+    def throughput(self) -> Dict[str, float]:
+        """Runs and steps per second over everything executed so far."""
+        elapsed = self.elapsed or float("nan")
+        return {"runs": self.runs_done, "steps": self.steps_done, "seconds": self.elapsed,
+                "runs/s": self.runs_done / elapsed, "steps/s": self.steps_done / elapsed}
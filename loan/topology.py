@@ -0,0 +1,149 @@
+import weakref
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import networkx as nx
+import numpy as np
+
+from loan.helpers import edge_costs, graph_from_json
+from loan.routing import PRECOMPUTE_LIMIT, RoutingTable
+
+
+class Topology:
+    """Immutable network of the body, shared by all models that run on it.
+
+    Holds the frozen graph and everything derived from it that doesn't change during a run:
+     - A dense index of the vertices
+     - The neighbors of every vertex
+     - The routing table with the shortest paths between vertices
+     - The predecessor and neighbor matrices in CSR form
+     - Optionally, layout coordinates of the vertices
+
+    The state of a single run (agents on vertices, ill vertices, heat) is kept by the model itself,
+    so creating a model on an existing topology is cheap.
+    """
+
+    def __init__(self, graph: nx.MultiDiGraph, positions: np.ndarray = None, neighbor_csr=None):
+        """Wraps the given graph, which is frozen in the process. Use `from_graph` to keep the graph modifiable.
+        `positions` holds the (x, y) layout coordinates per vertex index, `neighbor_csr` can be passed when known.
+        """
+        self.graph = nx.freeze(graph)
+        self.vertices: List[int] = list(graph.nodes)
+        self.index: Dict[int, int] = {vertex: i for i, vertex in enumerate(self.vertices)}
+        self.positions = positions
+        self._neighbor_csr = neighbor_csr
+        if neighbor_csr is None:
+            self._neighbors = {vertex: list(graph.neighbors(vertex)) for vertex in self.vertices}
+        else:
+            indptr, indices, _ = neighbor_csr
+            labels = np.asarray(self.vertices)[indices].tolist()
+            self._neighbors = {vertex: labels[start:end] for vertex, start, end
+                               in zip(self.vertices, indptr[:-1].tolist(), indptr[1:].tolist())}
+        self.routing = RoutingTable(self.graph, precompute=len(self.vertices) <= PRECOMPUTE_LIMIT)
+        self._predecessor_csr = None
+
+    @classmethod
+    def from_graph(cls, graph: nx.MultiDiGraph) -> "Topology":
+        """Topology of a copy of the given graph."""
+        return cls(graph.copy())
+
+    @classmethod
+    def of_graph(cls, graph: nx.MultiDiGraph) -> "Topology":
+        """Topology of the given graph, shared by all calls with the same graph object, e.g. by all models of a sweep
+        with the graph as network parameter. Changes to the graph after the first call are not seen, use
+        `from_graph` for a new topology of a changed graph."""
+        try:
+            return _TOPOLOGY_OF_GRAPH[graph]
+        except KeyError:
+            topology = _TOPOLOGY_OF_GRAPH[graph] = cls.from_graph(graph)
+            return topology
+
+    @classmethod
+    def from_edges(cls, network: np.ndarray, positions: np.ndarray = None, against_weight: int = 6,
+                   with_weight: int = 2, name: str = "HumanBody") -> "Topology":
+        """Topology of an edge array in the format of `graph_from_json`, e.g. of `generator.generate_network`.
+        With positions, row i holds the coordinates of vertex i + 1, otherwise the vertices are ordered as in the graph.
+        The neighbor matrix is built from the array directly, which is a lot faster than from the graph.
+        """
+        network = edge_costs(network, against_weight, with_weight)
+        sources, targets, costs = network.T
+        if positions is not None:
+            vertices = np.arange(1, len(positions) + 1)
+        else:
+            # Order of first appearance, like the nodes of the graph
+            labels, first = np.unique(network[:, :2].ravel(), return_index=True)
+            vertices = labels[np.argsort(first, kind="stable")]
+        order = np.argsort(vertices, kind="stable")
+        u = order[np.searchsorted(vertices, sources, sorter=order)]
+        v = order[np.searchsorted(vertices, targets, sorter=order)]
+
+        # The neighbors of a vertex in order of their first edge, with the cost of that edge (key 0 in the graph)
+        n = len(vertices)
+        _, first = np.unique(u * n + v, return_index=True)
+        first = first[np.lexsort((first, u[first]))]
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(u[first], minlength=n), out=indptr[1:])
+        neighbor_csr = indptr, v[first].astype(np.int64), costs[first].astype(np.int64)
+
+        graph = nx.MultiDiGraph(name=name)
+        graph.add_nodes_from(vertices.tolist())
+        graph.add_weighted_edges_from(network.tolist())
+        return cls(graph, positions, neighbor_csr)
+
+    def __len__(self) -> int:
+        return len(self.vertices)
+
+    def neighbors(self, vertex: int) -> List[int]:
+        """The vertices the given vertex has an edge to. The returned list is shared and should not be modified."""
+        return self._neighbors[vertex]
+
+    @property
+    def predecessor_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(indptr, indices), the predecessors of vertex index i are `indices[indptr[i]:indptr[i+1]]`.
+        Parallel edges are counted once."""
+        if self._predecessor_csr is None:
+            indptr, targets, _ = self.neighbor_csr
+            sources = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(indptr))
+            order = np.argsort(targets, kind="stable")
+
+            indptr = np.zeros(len(self) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(targets, minlength=len(self)), out=indptr[1:])
+            self._predecessor_csr = indptr, sources[order]
+        return self._predecessor_csr
+
+    @property
+    def neighbor_csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(indptr, indices, costs), the neighbors of vertex index i are `indices[indptr[i]:indptr[i+1]]`,
+        in the order of `neighbors`, and `costs` holds the energy cost of the edge to each of them."""
+        if self._neighbor_csr is None:
+            indptr, indices, costs = [0], [], []
+            for vertex in self.vertices:
+                for neighbor in self._neighbors[vertex]:
+                    indices.append(self.index[neighbor])
+                    costs.append(self.routing.edge_cost(vertex, neighbor))
+                indptr.append(len(indices))
+            self._neighbor_csr = (np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int64),
+                                  np.array(costs, dtype=np.int64))
+        return self._neighbor_csr
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} {self.graph.name}: vertices {len(self)}; edges {self.graph.number_of_edges()}"
+
+
+# Topologies of the graphs passed to `Topology.of_graph`, dropped with their graph
+_TOPOLOGY_OF_GRAPH: "weakref.WeakKeyDictionary[nx.MultiDiGraph, Topology]" = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=None)
+def _load_topology(fp: str) -> Topology:
+    if fp.endswith(".npz"):
+        from loan.generator import load_network
+        return Topology.from_edges(*load_network(fp), name=Path(fp).stem)
+    return Topology(graph_from_json(Path(fp)))
+
+
+def load_topology(fp: Path) -> Topology:
+    """Loads the topology of the network in the given file, a json file or a .npz file of `generator.save_network`.
+    Each file is only loaded and parsed once per process."""
+    return _load_topology(str(Path(fp).resolve()))
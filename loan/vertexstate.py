@@ -0,0 +1,173 @@
+from collections.abc import Mapping, Sequence
+from enum import IntEnum
+from typing import Dict, Iterable, Iterator, Optional
+
+import numpy as np
+
+
+class Illness(IntEnum):
+    """The illnesses a vertex can have, stored as a small int in `VertexState`."""
+    NONE = 0
+    CLAPITALISM = 1
+    KOVID = 2
+    CARING_TOO_MUCHE = 3
+    CUTIE_POX = 4
+
+
+# Names of the illnesses, indexed by illness code
+ILLNESS_LABELS = (None, "clapitalism", "kovid++", "Caring Too Muche", "Cutie Pox")
+
+
+class VertexState:
+    """Properties of all vertices, stored in NumPy arrays indexed by a dense vertex index.
+    Holds per vertex:
+     - heat_value, float between 0.0 and 1.0
+     - is_ill, if the vertex is ill
+     - illness, the current `Illness` of the vertex
+     - infected_at, the step at which the vertex last got ill, -1 if it never was
+    """
+
+    def __init__(self, vertices: Iterable[int], index: Dict[int, int] = None):
+        """The index of the vertices can be shared with the `Topology`, it is built from the vertices if not given."""
+        self.vertices = list(vertices)
+        self.index = {vertex: i for i, vertex in enumerate(self.vertices)} if index is None else index
+
+        n = len(self.vertices)
+        self.heat = np.zeros(n, dtype=np.float64)
+        self.is_ill = np.zeros(n, dtype=bool)
+        self.illness = np.zeros(n, dtype=np.int8)
+        self.infected_at = np.full(n, -1, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.vertices)
+
+    def heat_value(self, vertex: int) -> float:
+        return self.heat[self.index[vertex]]
+
+    def vertex_is_ill(self, vertex: int) -> bool:
+        return self.is_ill[self.index[vertex]]
+
+    def illness_type(self, vertex: int) -> Optional[str]:
+        """The name of the illness of the vertex, None if the vertex is healthy."""
+        return ILLNESS_LABELS[self.illness[self.index[vertex]]]
+
+    def set_ill(self, vertex: int, illness: Illness) -> None:
+        i = self.index[vertex]
+        self.is_ill[i] = True
+        self.illness[i] = illness
+
+    def set_healed(self, vertex: int) -> None:
+        i = self.index[vertex]
+        self.is_ill[i] = False
+        self.illness[i] = Illness.NONE
+
+    def view(self) -> "CellPropertiesView":
+        """Read-only view of the state in the form of the former `cell_properties` dictionary."""
+        return CellPropertiesView(self)
+
+
+class VertexView(Mapping):
+    """Read-only properties of one vertex, in the form {"heat_value": ..., "is_ill": ..., "illness_type": ...}."""
+    KEYS = ("heat_value", "is_ill", "illness_type")
+
+    def __init__(self, state: VertexState, vertex: int):
+        self._state = state
+        self._i = state.index[vertex]
+
+    def __getitem__(self, key: str):
+        if key == "heat_value":
+            return float(self._state.heat[self._i])
+        if key == "is_ill":
+            return bool(self._state.is_ill[self._i])
+        if key == "illness_type":
+            return ILLNESS_LABELS[self._state.illness[self._i]]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+
+class CellPropertiesView(Mapping):
+    """Read-only mapping of vertex -> `VertexView`, for readers of the former `cell_properties` dictionary."""
+
+    def __init__(self, state: VertexState):
+        self._state = state
+
+    def __getitem__(self, vertex: int) -> VertexView:
+        if vertex not in self._state.index:
+            raise KeyError(vertex)
+        return VertexView(self._state, vertex)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._state.vertices)
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+
+class IllVertexSet(Sequence):
+    """The ill vertices of a model, in the order in which they got ill, like the former `ill_vertices` list.
+
+    Adding, removing, testing membership and sampling a healthy vertex all take O(1):
+     - the ill vertices are kept as the keys of an (insertion ordered) dictionary
+     - the healthy vertices are kept in an array, removed by swapping with the last healthy vertex,
+       with the position of every vertex in that array
+    """
+
+    def __init__(self, vertices: Iterable[int], index: Dict[int, int] = None):
+        self.vertices = list(vertices)
+        self.index = {vertex: i for i, vertex in enumerate(self.vertices)} if index is None else index
+        self._ill: Dict[int, None] = {}
+        self._healthy = list(range(len(self.vertices)))  # Vertex indices, the healthy ones first
+        self._position = list(range(len(self.vertices)))  # Position of every vertex index in _healthy
+        self._n_healthy = len(self.vertices)
+
+    def __len__(self) -> int:
+        return len(self._ill)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ill)
+
+    def __contains__(self, vertex) -> bool:
+        return vertex in self._ill
+
+    def __getitem__(self, i):
+        return list(self._ill)[i]
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other) if isinstance(other, (Sequence, IllVertexSet)) else NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self._ill))
+
+    def _swap(self, i: int, position: int) -> None:
+        """Swaps vertex index i with the vertex index at the given position in _healthy."""
+        j = self._healthy[position]
+        self._healthy[self._position[i]], self._healthy[position] = j, i
+        self._position[j], self._position[i] = self._position[i], position
+
+    def add(self, vertex: int) -> None:
+        """Makes the vertex ill, it goes last in the order."""
+        if vertex in self._ill:
+            raise ValueError(f"{vertex} is already ill")
+        self._ill[vertex] = None
+        self._n_healthy -= 1
+        self._swap(self.index[vertex], self._n_healthy)
+
+    def remove(self, vertex: int) -> None:
+        """Makes the vertex healthy, raises ValueError if it isn't ill."""
+        if vertex not in self._ill:
+            raise ValueError(f"{vertex} is not ill")
+        del self._ill[vertex]
+        self._swap(self.index[vertex], self._n_healthy)
+        self._n_healthy += 1
+
+    def healthy_count(self) -> int:
+        return self._n_healthy
+
+    def sample_healthy(self, random) -> int:
+        """A random healthy vertex, drawn with the given random number generator."""
+        return self.vertices[self._healthy[random.randrange(self._n_healthy)]]
@@ -9,40 +9,91 @@ from loan.killeragent import KillerAgent
 
 
 class NetworkModule(VisualizationElement):
+    """Draws the network with sigma.js.
+    The layout and the edges are sent once per model in a "full" frame, every next frame is a "delta"
+    that only holds the nodes whose colour or label changed since the previous frame.
+    """
     package_includes = ["sigma.min.js"]
     local_includes = ["loan/js/GraphNetwork.js"]
 
-    def __init__(self, portrayal_method, canvas_height=700, canvas_width=600):
+    def __init__(self, layout_method, state_method, canvas_height=700, canvas_width=600):
 
-        self.portrayal_method = portrayal_method
+        self.layout_method = layout_method
+        self.state_method = state_method
         self.canvas_height = canvas_height
         self.canvas_width = canvas_width
         new_element = f"new GraphModule({self.canvas_width}, {self.canvas_height})"
         self.js_code = f"elements.push({new_element});"
 
+        self._topology = None
+        self._layout = None
+        self._model = None
+        self._states = {}
+
     def render(self, model):
-        return self.portrayal_method(model)
+        if model.topology is not self._topology:
+            self._topology = model.topology
+            self._layout = self.layout_method(model)
+
+        states = self.state_method(model)
+        if model is not self._model:
+            self._model = model
+            self._states = states
+            nodes = [{**node, "color": states[node["id"]][0], "label": states[node["id"]][1]}
+                     for node in self._layout["nodes"]]
+            return {"type": "full", "nodes": nodes, "edges": self._layout["edges"]}
+
+        previous, self._states = self._states, states
+        return {"type": "delta",
+                "nodes": [{"id": node_id, "color": colour, "label": label}
+                          for node_id, (colour, label) in states.items() if previous.get(node_id) != (colour, label)]}
+
+
+def canvas_positions(topology, w_canvas: int = 600, h_canvas: int = 600):
+    """Positions of the vertices on the canvas, from the layout of the topology or the hand-made one of the body."""
+    if topology.positions is None:
+        return node_positions_on_canvas(give_node_positions(), w_canvas, h_canvas)
+    # Layout coordinates are in [0, 1], keep a margin around them
+    x = (0.05 + 0.9 * topology.positions[:, 0]) * w_canvas
+    y = h_canvas - (0.05 + 0.9 * topology.positions[:, 1]) * h_canvas
+    return {vertex: {"x": float(x[i]), "y": float(y[i])} for i, vertex in enumerate(topology.vertices)}
+
+
+def network_layout(model):
+    """The static part of the portrayal: the positions of the nodes and the edges."""
+    positions = canvas_positions(model.topology)
+    layout = {}
+    layout["nodes"] = [{"id": node_id,
+                        "x": positions.get(node_id).get("x"),
+                        "y": positions.get(node_id).get("y"),
+                        "size": 20}
+                       for node_id in model.network.nodes]
+
+    layout["edges"] = [{"id": edge_id,
+                        "type": "curvedArrow",
+                        "source": source,
+                        "target": target,
+                        "color": "#000000"}
+                       for edge_id, (source, target, _) in enumerate(model.network.edges)]
+
+    return layout
+
+
+def node_states(model):
+    """The changing part of the portrayal: (colour, label) per node."""
+    occupied = set(model.get_occupied_vertices())  # Only these need a look at the agents on them
+    return {node_id: (set_colour(model.cell_properties.get(node_id).get("heat_value")),
+                      build_label(node_id, model.get_agents_on_vertex(node_id) if node_id in occupied else ()))
+            for node_id in model.network.nodes}
 
 
 def network_portrayal(model):
-    new_positions = node_positions_on_canvas(give_node_positions())
-    portrayal = {}
-    portrayal["nodes"] = [{"id": node_id,
-                           "x": new_positions.get(node_id).get("x"),
-                           "y": new_positions.get(node_id).get("y"),
-                           "size": 20,
-                           "color": set_colour(model.cell_properties.get(node_id).get("heat_value")),
-                           "label": build_label(node_id, agents)}
-                          for (node_id, agents) in model.network.nodes.data("agent")]
-
-    portrayal["edges"] = [{"id": edge_id,
-                           "type": "curvedArrow",
-                           "source": source,
-                           "target": target,
-                           "color": "#000000"}
-                          for edge_id, (source, target, _) in enumerate(model.network.edges)]
-
-    return portrayal
+    """The full portrayal of the network, as sent in the first frame of a model."""
+    layout = network_layout(model)
+    states = node_states(model)
+    for node in layout["nodes"]:
+        node["color"], node["label"] = states[node["id"]]
+    return layout
 
 
 def build_label(vertex_id, agents):
@@ -67,7 +118,7 @@ health_chart = ChartModule([{"Label": "Hitpoints", "Color": "Red"}], canvas_heig
 helperagent_chart = ChartModule([{"Label": "Helper Agents energy", "Color": "Blue"}], canvas_height=80, canvas_width=250,
                                 data_collector_name="datacollector")
 
-tiles = [NetworkModule(network_portrayal, 400, 500), health_chart, helperagent_chart]
+tiles = [NetworkModule(network_layout, node_states, 400, 500), health_chart, helperagent_chart]
 
 textvalue = """Welcome to your imperfect body!"""
 
@@ -80,3 +131,16 @@ model_params = {
     "max_ill_vertices": UserSettableParameter("slider", "Max simultaneous ill vertices", 4, 0, 15, 1),
     "helper_type": UserSettableParameter("choice", "Helper Type", value="helperagent", choices=["helperagent", "greedyhelperagent"]),
 }
+
+
+def replay_params(log_path):
+    """Parameters of a `ReplayModel` of the given run log: the speed in ticks per frame and the tick to start at."""
+    from loan.recorder import load_run_log
+
+    n_ticks = len(load_run_log(log_path))
+    return {
+        "how_to": UserSettableParameter("static_text", value=f"Replay of {log_path}, press reset to seek."),
+        "log": str(log_path),
+        "speed": UserSettableParameter("slider", "Ticks per frame", 1, 1, 50, 1),
+        "start_tick": UserSettableParameter("slider", "Start at tick", 0, 0, max(n_ticks - 1, 1), 1),
+    }
@@ -0,0 +1,20 @@
+import argparse
+
+from loan.recorder import record_run
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Records a run of the model, replay it with main_visualization.py --replay")
+    parser.add_argument("output", help="file to write the run log to")
+    parser.add_argument("--steps", type=int, default=1000, help="maximum amount of steps")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--N", type=int, default=1, help="number of helper agents")
+    parser.add_argument("--hitpoints", type=int, default=150)
+    parser.add_argument("--factory-location", type=int, default=None)
+    parser.add_argument("--helper-type", default="helperagent", choices=["helperagent", "greedyhelperagent"])
+    parser.add_argument("--helper-engine", default="object", choices=["object", "vectorized"])
+    args = parser.parse_args()
+
+    model = record_run(args.output, args.steps, seed=args.seed, N=args.N, hitpoints=args.hitpoints,
+                       factory_location=args.factory_location, helper_type=args.helper_type,
+                       helper_engine=args.helper_engine, collect_data=False)
+    print(f"Recorded {model.schedule.steps} steps to {args.output}")
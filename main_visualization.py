@@ -1,9 +1,11 @@
+import argparse
+
 from mesa.visualization.ModularVisualization import ModularServer
 from tornado import autoreload
 from tornado.ioloop import IOLoop
 
 from loan.model import HumanModel
-from loan.visualization import model_params, tiles
+from loan.visualization import model_params, replay_params, tiles
 
 
 class Server(ModularServer):
@@ -19,5 +21,14 @@ class Server(ModularServer):
 
 
 if __name__ == "__main__":
-    server = Server(HumanModel, tiles, "Human Model", model_params)
-    server.launch(port=8581)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replay", default=None, help="run log written by main_record.py to play back")
+    parser.add_argument("--port", type=int, default=8581)
+    args = parser.parse_args()
+
+    if args.replay is None:
+        server = Server(HumanModel, tiles, "Human Model", model_params)
+    else:
+        from loan.replay import ReplayModel
+        server = Server(ReplayModel, tiles, "Human Model (replay)", replay_params(args.replay))
+    server.launch(port=args.port)
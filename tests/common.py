@@ -0,0 +1,37 @@
+"""Helpers of the tests: running models side by side and comparing what they collected."""
+from typing import List, Tuple
+
+import pandas as pd
+
+from loan.model import HumanModel
+
+
+def agent_states(model: HumanModel, ids: bool = True) -> Tuple:
+    """The agents on every vertex: emoji, id, energy and alert, in the order of the vertex.
+    Without ids, the agents are described by emoji, energy and alert only, in sorted order."""
+    states = []
+    for vertex in model.topology.vertices:
+        agents = model.get_agents_on_vertex(vertex)
+        if ids:
+            states.append(tuple((agent.emojify(), agent.unique_id, getattr(agent, "energy", None),
+                                 getattr(agent, "alert_for_disease_on_node", None)) for agent in agents))
+        else:
+            states.append(tuple(sorted(repr((agent.emojify(), getattr(agent, "energy", None),
+                                             getattr(agent, "alert_for_disease_on_node", None))) for agent in agents)))
+    return tuple(states)
+
+
+def run(model: HumanModel, max_steps: int = 150, ids: bool = True) -> List[Tuple]:
+    """Runs the model, returns the ill vertices and the agent states after every step."""
+    trace = []
+    while model.running and model.schedule.steps < max_steps:
+        model.step()
+        trace.append((list(model.ill_vertices), model.healed_count, agent_states(model, ids)))
+    return trace
+
+
+def assert_same_runs(a: HumanModel, b: HumanModel, max_steps: int = 150, ids: bool = True) -> None:
+    """Runs both models and checks that they went through the same states and collected the same data."""
+    assert run(a, max_steps, ids) == run(b, max_steps, ids)
+    pd.testing.assert_frame_equal(a.datacollector.get_model_vars_dataframe(),
+                                  b.datacollector.get_model_vars_dataframe())
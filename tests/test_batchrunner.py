@@ -0,0 +1,21 @@
+from loan.batchrunner import factory_sets, run_batch
+
+
+def test_mixed_single_and_multiple_factories():
+    df = run_batch(iterations=2, max_steps=10, processes=1,
+                   variable_params={"factory_location": (3, (2, 9)), "N": (1, 2)})
+    assert len(df) == 8
+    assert list(df["factory_location"].drop_duplicates()) == [(2, 9), 3]
+
+
+def test_factory_sets():
+    df = run_batch(iterations=1, max_steps=10, processes=1,
+                   variable_params={"factory_location": factory_sets(2, (2, 5, 9))})
+    assert list(df["factory_location"]) == [(2, 5), (2, 9), (5, 9)]
+
+
+def test_steps_are_numbered_by_collected_step(tmp_path):
+    sink = run_batch(iterations=1, max_steps=10, processes=1, output=tmp_path / "results.csv", collect_steps=True,
+                     variable_params={"N": (1,)}, fixed_params={"factory_location": 3, "collect_interval": 2})
+    steps = sink.read_dataframe(steps=True)
+    assert list(steps["Step"]) == list(range(2, len(steps) * 2 + 1, 2))
@@ -0,0 +1,13 @@
+from loan.model import HumanModel
+
+
+def test_ill_vertices_in_order_of_infection():
+    # More steps than the initial capacity of the collector, so its buffers grow
+    model = HumanModel(N=2, factory_location=3, hitpoints=10**6, illness_chance=0.5, max_ill_vertices=8, seed=0)
+    expected = []
+    for _ in range(300):
+        model.step()
+        expected.append(list(model.ill_vertices))
+    assert any(ill != sorted(ill) for ill in expected)
+    assert list(model.datacollector.model_vars["Ill vertices"]) == expected
+    assert list(model.datacollector.model_vars["Ill vertex count"]) == [len(ill) for ill in expected]
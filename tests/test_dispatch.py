@@ -0,0 +1,89 @@
+import math
+from types import SimpleNamespace
+
+import pytest
+
+from loan.model import HumanModel
+
+KNOWN, NEW = "kovid++", "clapitalism"
+
+
+def make_factory(**params):
+    """The factory of a model without illness, that knows the KNOWN disease."""
+    model = HumanModel(N=1, factory_location=3, illness_chance=0, seed=0, **params)
+    factory = model.agent_factory
+    factory.library_of_diseases.append(KNOWN)
+    return model, factory
+
+
+def tick(model, factory, *alerts):
+    """Lets the factory handle helpers with the given (target, disease) alerts, returns the targets it spawns."""
+    model.schedule.steps += 1
+    factory.helper_agents_with_alerts = [SimpleNamespace(alert_for_disease_on_node=alert) for alert in alerts]
+    factory.act()
+    spawned = [killer.target_location for killer in factory.killer_agents_to_spawn]
+    factory.update()
+    return spawned
+
+
+def test_duplicate_report_is_ignored():
+    model, factory = make_factory()
+    assert tick(model, factory, (5, KNOWN), (5, KNOWN), (5, NEW)) == [5]
+    assert model.dispatch.queue_length() == 1  # The killer for (5, NEW), waiting while NEW is studied
+    # The killer for (5, KNOWN) is still on its way, only the one for (5, NEW) is spawned
+    assert factory.nanite_queue[0][3].target_disease == NEW
+    assert tick(model, factory, (5, KNOWN), (5, NEW)) == [5]
+    assert model.dispatch.queue_length() == 0
+
+
+@pytest.mark.parametrize("policy, order", [("wait", [5, 8]), ("damage", [8, 5])])
+def test_priority_order(policy, order):
+    model, factory = make_factory(dispatch_policy=policy, spawn_rate=1)
+    index = model.topology.index
+    model.vertex_state.infected_at[index[5]] = 4
+    model.vertex_state.infected_at[index[8]] = 2  # Ill for longer
+    assert tick(model, factory, (5, KNOWN), (8, KNOWN)) == order[:1]
+    assert tick(model, factory) == order[1:]
+
+
+def test_wait_policy_serves_oldest_report_first():
+    model, factory = make_factory(spawn_rate=1)
+    assert tick(model, factory, (5, KNOWN), (8, KNOWN)) == [5]
+    assert tick(model, factory, (2, KNOWN)) == [8]
+    assert tick(model, factory) == [2]
+
+
+def test_spawn_rate_caps_killers_per_tick():
+    model, factory = make_factory(spawn_rate=2)
+    assert tick(model, factory, *((target, KNOWN) for target in (1, 2, 4, 5, 8))) == [1, 2]
+    assert model.dispatch.queue_length() == 3
+    assert tick(model, factory) == [4, 5]
+    assert tick(model, factory) == [8]
+    assert model.dispatch.queue_length() == 0
+
+
+def test_new_disease_waits_one_tick():
+    model, factory = make_factory()
+    assert tick(model, factory, (5, NEW)) == []
+    assert NEW in factory.library_of_diseases
+    assert tick(model, factory) == [5]
+    # Known from now on
+    assert tick(model, factory, (8, NEW)) == [8]
+
+
+def test_queue_length_and_mean_latency():
+    model, factory = make_factory(spawn_rate=1)
+    dispatch = model.dispatch
+    assert dispatch.queue_length() == 0 and math.isnan(dispatch.mean_latency())
+    tick(model, factory, (5, KNOWN), (8, KNOWN), (2, KNOWN))
+    assert dispatch.queue_length() == 2
+    model.schedule.steps += 3
+    dispatch.complete(5, KNOWN, healed=True)
+    dispatch.complete(8, KNOWN, healed=False)  # Not counted, e.g. a cancelled killer
+    model.schedule.steps += 1
+    dispatch.complete(2, KNOWN, healed=True)
+    assert dispatch.latencies == [3, 4]
+    assert dispatch.mean_latency() == 3.5
+    assert model.get_mean_heal_latency() == 3.5
+    assert model.get_dispatch_queue_length() == dispatch.queue_length() == 2
+    assert dispatch.report(5, KNOWN) and not dispatch.report(5, KNOWN)
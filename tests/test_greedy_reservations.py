@@ -0,0 +1,59 @@
+import pytest
+
+import loan.model
+from loan.greedyhelperagent import GreedyHelperAgent
+from loan.helperagent import HelperAgent, NextState
+from loan.model import HumanModel
+from tests.common import assert_same_runs
+
+
+class ListGreedyHelperAgent(GreedyHelperAgent):
+    """GreedyHelperAgent spreading out through lists of unavailable vertices that every helper keeps for the helpers
+    on its vertex, as before the `ReservationTable`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.unavailable_vertices = []
+
+    def perceive(self) -> None:
+        super().perceive()
+        self.perception["agents_on_vertex"] = [agent for agent in self.model.grid.get_cell(self.pos)
+                                               if isinstance(agent, HelperAgent) and not agent.travelling_to_factory()]
+
+    def act(self) -> None:
+        neighbors = self.perception["all_neighbor_vertices"]
+        self.available_vertices = set(neighbors) - set(self.unavailable_vertices)
+        if self.perception["cur_pos_is_ill"]:
+            if not self.alert_for_disease_on_node:
+                self.alert_for_disease_on_node = (self.pos, self.perception["cur_pos_illness_type"])
+            self.next_state = NextState(*self.model.routing.next_hop(self.pos, self.factory_location))
+        elif self.alert_for_disease_on_node:
+            self.next_state = NextState(*self.model.routing.next_hop(self.pos, self.factory_location))
+        else:
+            if not self.available_vertices:
+                for agent in self.perception["agents_on_vertex"]:
+                    agent.unavailable_vertices = []
+                chosen_vertex = self.model.random.choice(self._list_of_best_neighbors(neighbors))
+            else:
+                chosen_vertex = self.model.random.choice(self._list_of_best_neighbors(list(self.available_vertices)))
+                for agent in self.perception["agents_on_vertex"]:
+                    agent.unavailable_vertices.append(chosen_vertex)
+            self.next_state = NextState(target=chosen_vertex,
+                                        energy_cost=self.model.routing.edge_cost(self.pos, chosen_vertex))
+
+    def update(self) -> None:
+        super().update()
+        self.unavailable_vertices = []
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("params", [dict(N=12, factory_location=3), dict(N=50, factory_location=3),
+                                    dict(N=50, factory_location=(3, 9), cancel_stale_killers=True, illness_chance=0.5)])
+def test_reservations_spread_helpers_like_lists(seed, params, monkeypatch):
+    params = dict(helper_type="greedyhelperagent", max_helperagent_energy=200, seed=seed, **params)
+    model = HumanModel(**params)
+    monkeypatch.setattr(loan.model, "GreedyHelperAgent", ListGreedyHelperAgent)
+    reference = HumanModel(**params)
+    assert all(type(agent) is ListGreedyHelperAgent for agent in reference.schedule.agents
+               if isinstance(agent, HelperAgent))
+    assert_same_runs(reference, model)
@@ -0,0 +1,20 @@
+import pytest
+
+from loan.model import HumanModel
+from tests.common import assert_same_runs
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("params", [dict(N=1, factory_location=3), dict(N=10, factory_location=3),
+                                    dict(N=10, factory_location=(3, 9)),
+                                    dict(N=10, factory_location=3, cancel_stale_killers=True, illness_chance=0.5)])
+def test_vectorized_engine_runs_like_object_engine(seed, params):
+    """The HelperPopulation gives the same runs as individual HelperAgents. Population members have no ids,
+    the agents are compared by emoji, energy and alert instead."""
+    assert_same_runs(HumanModel(seed=seed, **params), HumanModel(seed=seed, helper_engine="vectorized", **params),
+                     ids=False)
+
+
+def test_vectorized_engine_only_supports_helperagent():
+    with pytest.raises(ValueError):
+        HumanModel(helper_type="greedyhelperagent", helper_engine="vectorized")
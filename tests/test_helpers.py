@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import loan.helpers
+from loan.helpers import load_network_edges
+from loan.model import HumanModel
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(loan.helpers, "CACHE_DIR", tmp_path / "cache")
+    return tmp_path / "cache"
+
+
+def test_second_load_reads_cache(cache_dir, monkeypatch):
+    first = load_network_edges(HumanModel.NETWORK)
+    assert [path.suffix for path in cache_dir.iterdir()] == [".npy"]
+
+    def no_parsing(*args, **kwargs):
+        raise AssertionError("the json file was parsed again")
+    monkeypatch.setattr(loan.helpers, "json", SimpleNamespace(loads=no_parsing))
+    second = load_network_edges(HumanModel.NETWORK)
+    np.testing.assert_array_equal(second, first)
+    assert second.dtype == first.dtype
+
+
+def test_failed_cache_write_leaves_no_tmp_file(cache_dir, monkeypatch):
+    def full_disk(f, array):
+        f.write(b"partial")
+        raise OSError("No space left on device")
+    monkeypatch.setattr(np, "save", full_disk)
+    network = load_network_edges(HumanModel.NETWORK)
+    assert list(cache_dir.iterdir()) == []
+    np.testing.assert_array_equal(network, load_network_edges(HumanModel.NETWORK, use_cache=False))
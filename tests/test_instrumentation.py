@@ -0,0 +1,43 @@
+import itertools
+import pickle
+from types import SimpleNamespace
+
+import pandas as pd
+
+import loan.instrumentation
+from loan.instrumentation import INSTRUMENTATION_COLUMNS, InstrumentedActivityScheduler
+from loan.model import HumanModel
+
+# Columns that don't hold wall times, the same in every run
+COUNT_COLUMNS = ["Hitpoints", "Ill vertices", "Path queries", "Neighbor lookups", "Grid moves"]
+
+
+def test_instrumented_model_pickles():
+    model = HumanModel(N=5, factory_location=3, seed=0, instrument=True)
+    assert isinstance(model.schedule, InstrumentedActivityScheduler)
+    for _ in range(10):
+        model.step()
+    copy = pickle.loads(pickle.dumps(model))
+    for _ in range(10):
+        model.step()
+        copy.step()
+    assert copy.instrumentation.counters == model.instrumentation.counters
+    assert copy.instrumentation.steps == model.instrumentation.steps == 20
+    pd.testing.assert_frame_equal(copy.datacollector.get_model_vars_dataframe()[COUNT_COLUMNS],
+                                  model.datacollector.get_model_vars_dataframe()[COUNT_COLUMNS])
+
+
+
+def test_columns_hold_totals_over_collect_interval(monkeypatch):
+    # A clock that ticks on every reading, so every timed call takes at least one tick
+    clock = itertools.count()
+    monkeypatch.setattr(loan.instrumentation, "time", SimpleNamespace(perf_counter=lambda: next(clock)))
+    model = HumanModel(N=5, factory_location=3, seed=0, instrument=True, collect_interval=3)
+    for _ in range(30):
+        model.step()
+    df = model.datacollector.get_model_vars_dataframe()
+    assert set(INSTRUMENTATION_COLUMNS) <= set(df.columns)
+    # The stages of all steps since the previous row ran within the steps of the row
+    assert (df["Step time"] > df[["Perceive time", "Act time", "Update time"]].sum(axis=1)).all()
+    assert df["Step time"].sum() <= model.instrumentation.phase_times["step"]
+    assert df["Grid moves"].sum() == model.instrumentation.counters["grid.move_agent"]
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from loan.model import HumanModel
+from loan.vertexstate import IllVertexSet
+from tests.common import assert_same_runs
+
+
+class ListModel(HumanModel):
+    """HumanModel keeping its ill vertices in a list and drawing the vertex to infect from a set difference,
+    as before `IllVertexSet`."""
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.ill_vertices = []
+
+    def _set_random_vertex_to_ill(self):
+        options = set(self.topology.vertices) - set(self.ill_vertices)
+        vertex = self.random.choice(list(options))
+        self.ill_vertices.append(vertex)
+        self._update_illness_status(vertex, False)
+
+
+# (seed, helper_type, N) -> steps and the last (hitpoints, sorted ill vertices, alive helpers, energy, healed)
+# of a run with factory_location=3, recorded before `IllVertexSet`
+RECORDED = {(0, "helperagent", 4): (77, (0, (1, 11, 13), 4, 363, 13)),
+            (1, "helperagent", 12): (99, (-2, (7, 11, 12, 13), 12, 1083, 15)),
+            (2, "greedyhelperagent", 4): (74, (0, (2, 3, 5, 6), 0, 0, 5)),
+            (3, "helperagent", 4): (103, (0, (12,), 4, 346, 14))}
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("params", [dict(N=4), dict(N=4, helper_type="greedyhelperagent"),
+                                    dict(N=10, helper_engine="vectorized", illness_chance=0.6, max_ill_vertices=8)])
+def test_legacy_sampling_runs_like_list(seed, params):
+    # Members of the vectorized population have no unique id
+    ids = params.get("helper_engine") != "vectorized"
+    assert_same_runs(ListModel(seed=seed, factory_location=3, **params),
+                     HumanModel(seed=seed, factory_location=3, legacy_infection_sampling=True, **params), ids=ids)
+
+
+@pytest.mark.parametrize("key", RECORDED)
+def test_legacy_sampling_reproduces_recorded_runs(key):
+    seed, helper_type, n = key
+    model = HumanModel(N=n, helper_type=helper_type, factory_location=3, seed=seed, legacy_infection_sampling=True)
+    steps = 0
+    while model.running and steps < 200:
+        model.step()
+        steps += 1
+    last = (model.hitpoints, tuple(sorted(model.ill_vertices)), model.alive_helper_agents, model.total_energy_agents,
+            model.healed_count)
+    assert (steps, last) == RECORDED[key]
+
+
+def test_ill_vertex_set_behaves_like_list():
+    rng = random.Random(1)
+    ill, reference = IllVertexSet(range(50)), []
+    for _ in range(5000):
+        if reference and rng.random() < 0.5:
+            vertex = rng.choice(reference)
+            reference.remove(vertex)
+            ill.remove(vertex)
+        elif len(reference) < 50:
+            vertex = ill.sample_healthy(rng)
+            assert vertex not in reference
+            reference.append(vertex)
+            ill.add(vertex)
+        assert ill == reference and len(ill) == len(reference) and ill.healthy_count() == 50 - len(reference)
+    with pytest.raises(ValueError):
+        ill.remove(next(v for v in range(50) if v not in reference))
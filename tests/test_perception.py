@@ -0,0 +1,41 @@
+import networkx as nx
+import pytest
+
+from loan.model import HumanModel
+from tests.common import assert_same_runs
+
+
+@pytest.mark.parametrize("radius", [0, 1, 3])
+@pytest.mark.parametrize("helper_type", ["helperagent", "greedyhelperagent"])
+def test_perception_radius_only_trims_percepts(radius, helper_type):
+    params = dict(N=8, factory_location=3, helper_type=helper_type, max_helperagent_energy=200, seed=radius)
+    assert_same_runs(HumanModel(**params), HumanModel(perception_radius=radius, **params))
+
+
+@pytest.mark.parametrize("radius", [0, 1, 2])
+def test_paths_within_stay_within_radius(radius):
+    model = HumanModel(N=1, factory_location=3, seed=0)
+    routing, graph = model.routing, model.topology.graph
+    for source in graph.nodes:
+        ball = routing.within(source, radius)
+        assert ball == nx.single_source_shortest_path_length(graph, source, cutoff=radius)
+        for target in graph.nodes:
+            paths = routing.paths_within(source, target, radius)
+            if target not in ball:
+                assert paths == []
+                continue
+            assert paths and all(path[0] == source and path[-1] == target for path in paths)
+            assert all(vertex in ball for path in paths for vertex in path)
+            if all(vertex in ball for path in routing.paths(source, target) for vertex in path):
+                assert sorted(paths) == sorted(routing.paths(source, target))
+
+
+def test_helpers_sense_ill_vertices_within_radius():
+    model = HumanModel(N=3, factory_location=3, illness_chance=1, max_ill_vertices=8, perception_radius=1, seed=0)
+    for _ in range(5):
+        model.step()
+    for agent in model.schedule.agents:
+        if hasattr(agent, "perception"):
+            ball = model.routing.within(agent.pos, 1)
+            assert agent.perception["ill_vertices"] == [vertex for vertex in ball if vertex in model.ill_vertices]
+            assert len(agent.perception["shortest_paths_per_ill_vertex"]) == len(agent.perception["ill_vertices"])
@@ -0,0 +1,57 @@
+import pytest
+
+from loan.model import HumanModel
+from loan.recorder import Recorder
+from loan.replay import ReplayModel
+
+
+def state(model):
+    """The ill vertices, model values and agents per vertex, in a form shared by `HumanModel` and `ReplayModel`."""
+    agents = tuple(tuple(agent.emojify() for agent in model.get_agents_on_vertex(vertex))
+                   for vertex in model.topology.vertices)
+    return (sorted(model.ill_vertices), model.hitpoints, model.alive_helper_agents, model.total_energy_agents,
+            model.healed_count, agents)
+
+
+def record(path, steps=120, **params):
+    """Records a run to path, returns the state of the live model at every tick."""
+    model = HumanModel(**params)
+    states = [state(model)]
+    with Recorder(model, path, params) as recorder:
+        while model.running and model.schedule.steps < steps:
+            model.step()
+            recorder.record()
+            states.append(state(model))
+    return states
+
+
+@pytest.mark.parametrize("params", [dict(N=10, seed=0), dict(N=10, helper_type="greedyhelperagent", seed=1),
+                                    dict(N=10, helper_engine="vectorized", seed=2),
+                                    dict(N=5, factory_location=(3, 9), cancel_stale_killers=True, seed=3)])
+def test_replay_matches_live_model(tmp_path, params):
+    params = {**dict(factory_location=3, hitpoints=10**6, illness_chance=0.5, max_ill_vertices=8,
+                     max_helperagent_energy=1000), **params}
+    states = record(tmp_path / "run.loanlog", **params)
+    assert len(states) > 2 * ReplayModel.KEYFRAME_INTERVAL
+
+    replay = ReplayModel(tmp_path / "run.loanlog")
+    assert state(replay) == states[0]
+    for tick in range(1, len(states)):
+        replay.step()
+        assert replay.tick == replay.steps == tick
+        assert state(replay) == states[tick]
+    assert not replay.running
+
+    # Backwards, from keyframes and from the start
+    for tick in (len(states) - 2, 77, ReplayModel.KEYFRAME_INTERVAL, 30, 0):
+        replay.seek(tick)
+        assert state(replay) == states[tick]
+    replay.speed = 7
+    replay.step()
+    assert state(replay) == states[7]
+
+    # A new replay of the same log, starting with seeks backward before any keyframe is kept
+    replay = ReplayModel(tmp_path / "run.loanlog", start_tick=len(states) - 1)
+    for tick in (60, 10):
+        replay.seek(tick)
+        assert state(replay) == states[tick]
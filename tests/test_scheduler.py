@@ -0,0 +1,40 @@
+import pytest
+from mesa.time import StagedActivation
+
+from loan.model import HumanModel
+from loan.scheduler import ActivityScheduler
+from tests.common import assert_same_runs
+
+
+class CallAllScheduler(ActivityScheduler):
+    """Calls every agent in every stage, like StagedActivation, without skipping or sleeping agents."""
+
+    def step(self) -> None:
+        StagedActivation.step(self)
+
+
+def call_all(model: HumanModel) -> HumanModel:
+    model.schedule.__class__ = CallAllScheduler
+    return model
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("params", [dict(N=10, factory_location=3),
+                                    dict(N=10, factory_location=3, helper_type="greedyhelperagent",
+                                         max_helperagent_energy=200),
+                                    dict(N=10, factory_location=(3, 9), cancel_stale_killers=True, illness_chance=0.5),
+                                    dict(N=5, factory_location=(1, 8, 14), spawn_rate=2, dispatch_policy="damage"),
+                                    dict(N=10, factory_location=3, helper_engine="vectorized")])
+def test_activity_scheduler_runs_like_staged_activation(seed, params):
+    ids = params.get("helper_engine") != "vectorized"
+    assert_same_runs(HumanModel(seed=seed, **params), call_all(HumanModel(seed=seed, **params)), ids=ids)
+
+
+def test_idle_factory_sleeps_until_alert():
+    model = HumanModel(N=1, factory_location=3, illness_chance=0, seed=0)
+    model.step()
+    assert model.schedule.is_asleep(model.agent_factory)
+    helper = next(agent for agent in model.schedule.agents if agent is not model.agent_factory)
+    model.grid.move_agent(helper, model.agent_factory.pos)
+    helper.alert_for_disease_on_node = True
+    assert not model.schedule.is_asleep(model.agent_factory)
@@ -0,0 +1,89 @@
+import math
+
+import pytest
+
+from loan.model import HumanModel
+from loan.batchrunner import run_batch
+from loan.sweep import MODEL_REPORTERS, AdaptiveStopping, SweepExecutor, replay_run, run_model, run_seed
+
+
+def comparable(values):
+    """The reporters in values, with NaN (no vertex healed) as a value that compares equal to itself."""
+    return {name: "nan" if isinstance(values[name], float) and math.isnan(values[name]) else values[name]
+            for name in MODEL_REPORTERS}
+
+
+def reporters(model):
+    return comparable({name: reporter(model) for name, reporter in MODEL_REPORTERS.items()})
+
+
+@pytest.mark.parametrize("helper_type", ["helperagent", "greedyhelperagent"])
+@pytest.mark.parametrize("params", [dict(N=4, max_helperagent_energy=20, max_ill_vertices=3),
+                                    dict(N=1, max_helperagent_energy=10, max_ill_vertices=1, hitpoints=60),
+                                    dict(N=4, illness_chance=0)])
+def test_early_stop_gives_same_end_as_stepping(helper_type, params, monkeypatch):
+    fast_forwarded = []
+    fast_forward = HumanModel.fast_forward
+    monkeypatch.setattr(HumanModel, "fast_forward", lambda self, *args: fast_forwarded.append(fast_forward(self, *args)))
+    params = dict(helper_type=helper_type, factory_location=3, **params)
+    for seed in range(5):
+        stepped = run_model(params, seed, max_steps=300)
+        stopped = run_model(params, seed, max_steps=300, early_stop=True)
+        assert reporters(stopped) == reporters(stepped)
+        assert stopped.running == stepped.running
+    assert fast_forwarded  # Early stopping did happen
+
+
+def test_fast_forward_needs_absorbing_state():
+    model = HumanModel(N=4, factory_location=3, seed=0)
+    with pytest.raises(ValueError):
+        model.fast_forward(100)
+
+
+def test_adaptive_stopping_tolerance():
+    adaptive = AdaptiveStopping(metrics=["Hitpoints"], rel_tolerance=0, abs_tolerance=1.05, min_iterations=5)
+    assert not adaptive.is_converged([{"Hitpoints": 10}] * 4)  # Too few runs
+    assert adaptive.is_converged([{"Hitpoints": 10}] * 5)
+    # Half-width 1.96 * stdev / sqrt(n) of alternating 8 and 12: 1.087 for n=14, 1.012 for n=16
+    values = [{"Hitpoints": 8 + 4 * (i % 2)} for i in range(16)]
+    assert not adaptive.is_converged(values[:14])
+    assert adaptive.is_converged(values)
+
+
+def test_adaptive_sweep_stops_combinations_at_tolerance():
+    adaptive = AdaptiveStopping(metrics=["Hitpoints"], rel_tolerance=0.02, abs_tolerance=0.5, min_iterations=5,
+                                batch_iterations=5)
+    executor = SweepExecutor({"illness_chance": (0, 0.5)}, {"N": 4, "factory_location": 3}, iterations=40,
+                             max_steps=100, processes=1, adaptive=adaptive)
+    results = {0: [], 0.5: []}
+    for result in executor.run():
+        results[result.params["illness_chance"]].append(result.reporters)
+
+    # Without illness every run ends the same, converged after the first batch
+    assert len(results[0]) == 5
+    # The other combination stops at the first batch at which it is within tolerance, or after all iterations
+    runs = results[0.5]
+    assert len(runs) % 5 == 0 and 5 < len(runs) <= 40
+    assert not any(adaptive.is_converged(runs[:n]) for n in range(5, len(runs), 5))
+    assert adaptive.is_converged(runs) or len(runs) == 40
+
+
+def test_run_seed_is_stable():
+    # Derived from sha256, the same in every process and Python version
+    assert run_seed(0, {"N": 4, "factory_location": 3}, 2) == 18052643661966544295
+    assert run_seed(0, {"factory_location": 3, "N": 4}, 2) == run_seed(0, {"N": 4, "factory_location": 3}, 2)
+    assert run_seed(0, {"N": 4}, 1) != run_seed(0, {"N": 4}, 2) != run_seed(1, {"N": 4}, 2)
+
+
+def test_duplicate_values_run_once():
+    executor = SweepExecutor({"N": (1, 2, 1)}, iterations=2)
+    assert list(executor.param_combinations()) == [{"N": 1}, {"N": 2}]
+    assert len(executor.runs()) == 4
+
+
+def test_replay_run_reproduces_row():
+    fixed_params = {"factory_location": 3}
+    df = run_batch(iterations=3, max_steps=100, processes=1, variable_params={"N": (1, 4)}, fixed_params=fixed_params)
+    for row in df.to_dict("records"):
+        model = replay_run({**fixed_params, "N": row["N"]}, row["Seed"], max_steps=100)
+        assert reporters(model) == comparable(row)
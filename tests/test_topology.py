@@ -0,0 +1,91 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from loan.generator import generate_network, load_network, save_network
+from loan.helpers import graph_from_edges, load_network_edges
+from loan.model import HumanModel
+from loan.routing import PRECOMPUTE_LIMIT
+from loan.sweep import SweepExecutor
+from loan.topology import Topology, load_topology
+
+
+def assert_same_topology(a: Topology, b: Topology):
+    assert a.vertices == b.vertices
+    assert all(a.neighbors(vertex) == b.neighbors(vertex) for vertex in a.vertices)
+    for x, y in zip(a.neighbor_csr, b.neighbor_csr):
+        np.testing.assert_array_equal(x, y)
+    assert sorted(a.graph.edges(data="weight")) == sorted(b.graph.edges(data="weight"))
+    for source in a.vertices[::len(a) // 8]:
+        for target in a.vertices[::len(a) // 8]:
+            assert a.routing.best_path(source, target) == b.routing.best_path(source, target)
+
+
+@pytest.mark.parametrize("n_vertices, branching", [(2, 2), (15, 2), (100, 3), (301, 2)])
+def test_generated_network_is_connected(n_vertices, branching):
+    edges, positions = generate_network(n_vertices, branching, seed=1)
+    assert positions.shape == (n_vertices, 2) and ((0 <= positions) & (positions <= 1)).all()
+    assert set(edges[:, :2].ravel().tolist()) == set(range(1, n_vertices + 1))
+    # Every vessel is an edge with the flow and one against it
+    np.testing.assert_array_equal(edges[0::2, [1, 0]], edges[1::2, :2])
+    assert (edges[0::2, 2] == 0).all() and (edges[1::2, 2] == 1).all()
+    # Blood from the heart reaches every vertex and returns to it along the flow
+    flow = nx.DiGraph(edges[edges[:, 2] == 0, :2].tolist())
+    assert nx.is_strongly_connected(flow)
+
+
+def test_generated_network_is_seeded():
+    a, b, c = (generate_network(200, seed=seed)[0] for seed in (1, 1, 2))
+    np.testing.assert_array_equal(a, b)
+    assert not np.array_equal(a, c)
+
+
+@pytest.mark.parametrize("with_positions", [True, False])
+def test_save_and_load_network(tmp_path, with_positions):
+    edges, positions = generate_network(60, seed=0)
+    path = tmp_path / "network.npz"
+    save_network(path, edges, positions if with_positions else None)
+    loaded_edges, loaded_positions = load_network(path)
+    np.testing.assert_array_equal(loaded_edges, edges)
+    if with_positions:
+        np.testing.assert_array_equal(loaded_positions, positions)
+    else:
+        assert loaded_positions is None
+    assert sorted(graph_from_edges(loaded_edges).edges(data="weight")) == sorted(
+        graph_from_edges(edges).edges(data="weight"))
+
+
+def test_from_edges_builds_same_topology_as_from_graph(tmp_path):
+    # Above PRECOMPUTE_LIMIT, so only the compared routes are computed
+    edges, positions = generate_network(250, seed=0)
+    assert len(positions) > PRECOMPUTE_LIMIT
+    vertices = range(1, len(positions) + 1)
+    expected = Topology.from_graph(graph_from_edges(edges, vertices=vertices))
+    assert_same_topology(Topology.from_edges(edges, positions), expected)
+
+    save_network(tmp_path / "generated.npz", edges, positions)
+    topology = load_topology(tmp_path / "generated.npz")
+    assert_same_topology(topology, expected)
+    assert load_topology(tmp_path / "generated.npz") is topology
+
+
+def test_from_edges_of_body_network():
+    edges = load_network_edges(HumanModel.NETWORK, use_cache=False)
+    expected = Topology.from_graph(graph_from_edges(edges))
+    assert_same_topology(Topology.from_edges(edges), expected)
+    assert_same_topology(HumanModel(N=1).topology, expected)
+
+
+def test_models_share_topology_of_same_graph(monkeypatch):
+    graph = nx.MultiDiGraph(HumanModel(N=1).network)
+    built = []
+    from_graph = Topology.from_graph.__func__
+    monkeypatch.setattr(Topology, "from_graph", classmethod(lambda cls, g: built.append(g) or from_graph(cls, g)))
+
+    executor = SweepExecutor({"N": (1, 2)}, {"network": graph, "factory_location": 3}, iterations=3, max_steps=5,
+                             processes=1)
+    assert len(list(executor.run())) == 6
+    assert built == [graph]
+    assert HumanModel(N=1, network=graph).topology is HumanModel(N=2, network=graph).topology
+    assert not nx.is_frozen(graph)
+    assert HumanModel(N=1, network=nx.MultiDiGraph(graph)).topology is not HumanModel(N=1, network=graph).topology